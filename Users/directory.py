@@ -0,0 +1,66 @@
+from typing import Iterable, Iterator
+from Users.user import User
+
+class UserDirectory:
+    """
+    The library's users, keyed by their normalized name. Looking a user
+    up by name doesn't scan every account, and two users can't share a
+    name that only differs in case or surrounding spaces.
+    """
+    def __init__(self, users: Iterable[User]= None):
+        self.__users: dict[str, User]= {}
+        if users:
+            self.load(users)
+
+    @staticmethod
+    def normalize(name: str) -> str:
+        """
+        Returns the form of the name users are keyed by.
+        """
+        return name.strip().casefold()
+
+    def __contains__(self, name: str) -> bool:
+        return UserDirectory.normalize(name) in self.__users
+
+    def __iter__(self) -> Iterator[User]:
+        return iter(self.__users.values())
+
+    def __len__(self) -> int:
+        return len(self.__users)
+
+    def get(self, name: str) -> User:
+        """
+        Returns the user with the given name.
+        """
+        try:
+            return self.__users[UserDirectory.normalize(name)]
+        except KeyError:
+            raise ValueError("User doesn't exist.")
+
+    def add(self, user: User):
+        """
+        Adds a newly registered user.
+        """
+        if user.name in self:
+            raise ValueError("User already exists.")
+        self.__users[UserDirectory.normalize(user.name)]= user
+
+    def load(self, users: Iterable[User]):
+        """
+        Adds stored users. Older versions allowed the same name twice, so
+        a later account replaces an earlier one, as the old login scan did.
+        """
+        for user in users:
+            self.__users[UserDirectory.normalize(user.name)]= user
+
+    def clear(self):
+        """
+        Removes all the users.
+        """
+        self.__users.clear()
+
+    def toList(self) -> list[User]:
+        """
+        Returns a list of all the users.
+        """
+        return list(self)
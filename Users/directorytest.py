@@ -0,0 +1,24 @@
+import unittest
+from Users.directory import UserDirectory
+from Users.user import User
+
+class TestUserDirectory(unittest.TestCase):
+    def setUp(self):
+        self.user = User("TestUser", "hashedpass123", "salt123")
+        self.directory = UserDirectory([self.user])
+
+    def test_lookup(self):
+        self.assertIn(" testuser", self.directory)
+        self.assertIs(self.directory.get("TESTUSER"), self.user)
+        with self.assertRaises(ValueError):
+            self.directory.get("OtherUser")
+
+    def test_duplicate(self):
+        with self.assertRaises(ValueError):
+            self.directory.add(User("testUser", "otherpass", "salt456"))
+        self.assertEqual(len(self.directory), 1)
+
+    def test_load_keeps_latest(self):
+        newer = User("TestUser", "newpass", "salt456")
+        self.directory.load([newer])
+        self.assertEqual(self.directory.toList(), [newer])
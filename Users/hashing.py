@@ -0,0 +1,123 @@
+import hashlib
+import hmac
+import secrets
+from abc import ABC, abstractmethod
+
+class _PasswordHasher(ABC):
+    """
+    Base interface for password hashing schemes. A stored hash starts
+    with the scheme's name and its cost, so it can be verified after the
+    default scheme or cost changed, and upgraded on the next login.
+    """
+    NAME: str= None
+
+    @abstractmethod
+    def hash(self, password: str, salt: str) -> str:
+        """
+        Returns the stored form of the password.
+        """
+        pass
+
+    def verify(self, password: str, salt: str, stored: str) -> bool:
+        """
+        Returns True if the password matches the stored hash.
+        """
+        return hmac.compare_digest(self.hash(password, salt), stored)
+
+    @abstractmethod
+    def needsRehash(self, stored: str) -> bool:
+        """
+        Returns True if the stored hash wasn't made by this hasher at its cost.
+        """
+        pass
+
+    @classmethod
+    @abstractmethod
+    def fromStored(cls, stored: str) -> '_PasswordHasher':
+        """
+        Returns a hasher with the cost the stored hash was made with.
+        """
+        pass
+
+class SHA256Hasher(_PasswordHasher):
+    """
+    The single round of salted SHA-256 older versions stored. Only kept
+    to verify those hashes, so they can be upgraded.
+    """
+    NAME= 'sha256'
+
+    def hash(self, password: str, salt: str) -> str:
+        return hashlib.sha256((password+salt).encode()).hexdigest()
+
+    def needsRehash(self, stored: str) -> bool:
+        return True
+
+    @classmethod
+    def fromStored(cls, stored: str) -> 'SHA256Hasher':
+        return cls()
+
+class PBKDF2Hasher(_PasswordHasher):
+    """
+    PBKDF2-HMAC-SHA256. The cost is the number of iterations.
+    """
+    NAME= 'pbkdf2_sha256'
+
+    def __init__(self, iterations: int= 600_000):
+        self.iterations= iterations
+
+    def hash(self, password: str, salt: str) -> str:
+        digest= hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), self.iterations)
+        return f'{self.NAME}${self.iterations}${digest.hex()}'
+
+    def needsRehash(self, stored: str) -> bool:
+        return not stored.startswith(f'{self.NAME}${self.iterations}$')
+
+    @classmethod
+    def fromStored(cls, stored: str) -> 'PBKDF2Hasher':
+        return cls(int(stored.split('$')[1]))
+
+class ScryptHasher(_PasswordHasher):
+    """
+    scrypt. The cost is n, the CPU and memory cost, with r and p.
+    """
+    NAME= 'scrypt'
+
+    def __init__(self, n: int= 2**14, r: int= 8, p: int= 1):
+        self.n= n
+        self.r= r
+        self.p= p
+
+    def hash(self, password: str, salt: str) -> str:
+        digest= hashlib.scrypt(password.encode(), salt=salt.encode(), n=self.n, r=self.r, p=self.p,
+                               maxmem=256 * self.n * self.r)
+        return f'{self.NAME}${self.n}${self.r}${self.p}${digest.hex()}'
+
+    def needsRehash(self, stored: str) -> bool:
+        return not stored.startswith(f'{self.NAME}${self.n}${self.r}${self.p}$')
+
+    @classmethod
+    def fromStored(cls, stored: str) -> 'ScryptHasher':
+        _, n, r, p, _= stored.split('$')
+        return cls(int(n), int(r), int(p))
+
+HASHERS: dict[str, type[_PasswordHasher]]= {
+    hasher.NAME: hasher for hasher in (SHA256Hasher, PBKDF2Hasher, ScryptHasher)
+}
+
+def newSalt() -> str:
+    """
+    Returns a random salt for a new password hash.
+    """
+    return secrets.token_hex(16)
+
+def hasherFor(stored: str) -> _PasswordHasher:
+    """
+    Returns the hasher that made the stored hash. Hashes without a
+    scheme name are the SHA-256 hashes of older versions.
+    """
+    if '$' not in stored:
+        return SHA256Hasher()
+    name= stored.split('$', 1)[0]
+    if name not in HASHERS:
+        raise ValueError(f"Unknown password hash '{name}'")
+    return HASHERS[name].fromStored(stored)
@@ -0,0 +1,28 @@
+import hashlib
+import unittest
+from Users.hashing import PBKDF2Hasher, ScryptHasher, SHA256Hasher, hasherFor
+
+class TestHashing(unittest.TestCase):
+    def test_pbkdf2(self):
+        hasher = PBKDF2Hasher(1000)
+        stored = hasher.hash("password", "salt")
+        self.assertTrue(hasherFor(stored).verify("password", "salt", stored))
+        self.assertFalse(hasherFor(stored).verify("wrong", "salt", stored))
+        self.assertFalse(hasher.needsRehash(stored))
+        self.assertTrue(PBKDF2Hasher(2000).needsRehash(stored))
+
+    def test_scrypt(self):
+        hasher = ScryptHasher(n=2**10)
+        stored = hasher.hash("password", "salt")
+        self.assertTrue(hasherFor(stored).verify("password", "salt", stored))
+        self.assertTrue(PBKDF2Hasher(1000).needsRehash(stored))
+
+    def test_legacy_sha256(self):
+        stored = hashlib.sha256(("password" + "salt").encode()).hexdigest()
+        self.assertIsInstance(hasherFor(stored), SHA256Hasher)
+        self.assertTrue(hasherFor(stored).verify("password", "salt", stored))
+        self.assertTrue(hasherFor(stored).needsRehash(stored))
+
+    def test_unknown_scheme(self):
+        with self.assertRaises(ValueError):
+            hasherFor("md5$abc")
@@ -0,0 +1,100 @@
+import threading
+from typing import Iterable
+
+class EventLog:
+    """
+    A shared, bounded log of the library's notifications. Every event is
+    published once with the topics it concerns, and each user keeps a
+    cursor into the log instead of a copy of every message. Once the log
+    is over its capacity the oldest events are dropped, and a cursor
+    behind them continues from the oldest event still kept.
+    """
+    def __init__(self, capacity: int= 10_000):
+        self.capacity= capacity
+        self.__events: list[tuple[frozenset[str], str]]= []
+        # the sequence number of the first event in the list
+        self.__first= 0
+        self.__lock= threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.__events)
+
+    def latest(self) -> int:
+        """
+        Returns the cursor of the next event to be published.
+        """
+        return self.__first + len(self.__events)
+
+    def publish(self, message: str, topics: Iterable[str]= ('library',)) -> int:
+        """
+        Adds an event to the log. Returns its sequence number.
+        """
+        with self.__lock:
+            self.__events.append((frozenset(topics), message))
+            # drop the oldest events in chunks, so publishing stays O(1)
+            if len(self.__events) >= 2 * self.capacity:
+                dropped= len(self.__events) - self.capacity
+                del self.__events[:dropped]
+                self.__first+=dropped
+            return self.latest() - 1
+
+    def read(self, cursor: int, topics: set[str]= None, limit: int= None) -> tuple[list[str], int]:
+        """
+        Returns up to limit messages published from the cursor on, that
+        have one of the topics (all topics if None), and the cursor to
+        continue reading from.
+        """
+        with self.__lock:
+            # keep only the capacity's worth of events readable
+            start= max(cursor, self.latest() - self.capacity, self.__first)
+            messages: list[str]= []
+            for i in range(start - self.__first, len(self.__events)):
+                if limit is not None and len(messages) >= limit:
+                    return messages, self.__first + i
+                eventTopics, message= self.__events[i]
+                if topics is None or not eventTopics.isdisjoint(topics):
+                    messages.append(message)
+            return messages, self.latest()
+
+class Subscriptions:
+    """
+    An index from a topic, like an author or a genre, to the users
+    following it. Targeted events are handed to the followers directly,
+    so delivering one costs the number of followers, not of users.
+    """
+    def __init__(self):
+        # the followers of a topic in the order they followed it
+        self.__followers: dict[str, dict]= {}
+        self.__lock= threading.Lock()
+
+    def follow(self, topic: str, user):
+        """
+        Adds the user to the topic's followers.
+        """
+        with self.__lock:
+            self.__followers.setdefault(topic, {})[user]= None
+
+    def unfollow(self, topic: str, user):
+        """
+        Removes the user from the topic's followers.
+        """
+        with self.__lock:
+            followers= self.__followers.get(topic)
+            if followers and user in followers:
+                del followers[user]
+                if not followers:
+                    del self.__followers[topic]
+
+    def followers(self, topic: str) -> list:
+        """
+        Returns the users following the topic.
+        """
+        with self.__lock:
+            return list(self.__followers.get(topic, []))
+
+    def clear(self):
+        """
+        Removes all the subscriptions.
+        """
+        with self.__lock:
+            self.__followers.clear()
@@ -0,0 +1,39 @@
+import unittest
+from Users.notifications import EventLog
+from Users.user import User
+
+class TestEventLog(unittest.TestCase):
+    def setUp(self):
+        self.log = EventLog(capacity=3)
+
+    def test_paged_read(self):
+        for i in range(3):
+            self.log.publish(f"event {i}")
+        messages, cursor = self.log.read(0, limit=2)
+        self.assertEqual(messages, ["event 0", "event 1"])
+        self.assertEqual(self.log.read(cursor), (["event 2"], 3))
+
+    def test_topics(self):
+        self.log.publish("added", ("books", "title:dune"))
+        self.log.publish("logged in", ("users",))
+        self.assertEqual(self.log.read(0, {"title:dune"})[0], ["added"])
+
+    def test_capacity(self):
+        for i in range(10):
+            self.log.publish(f"event {i}")
+        self.assertLess(len(self.log), 6)
+        self.assertEqual(self.log.read(0)[0], ["event 7", "event 8", "event 9"])
+
+class TestUserFeed(unittest.TestCase):
+    def test_cursor(self):
+        log = EventLog()
+        log.publish("before")
+        user = User("TestUser", "hashedpass123", "salt123")
+        user.follow(log)
+        user.subscribe("books")
+        log.publish("book added", ("books",))
+        log.publish("user added", ("users",))
+        user.update("direct")
+        self.assertEqual(user.getNotifications(limit=1), ["direct"])
+        self.assertEqual(user.getNotifications(), ["book added"])
+        self.assertEqual(user.getNotifications(), [])
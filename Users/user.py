@@ -1,28 +1,97 @@
-import hashlib
+from Users.hashing import _PasswordHasher, hasherFor, newSalt
+from Users.notifications import EventLog
 
 class User:
     """
     Represents a User. Includes its username, password, and the
     books they borrowed. Also implements the Observer design pattern.
+    Library-wide notifications are read from a shared event log through
+    the user's cursor, only for the topics they subscribed to.
     """
     def __init__(self, name: str, password: str, salt: str):
         self.name = name
         self.__salt = salt
         self.__password = password
         self.__messages: list[str]= []
+        self.__feed: EventLog | None= None
+        self.__cursor= 0
+        self.__topics: set[str] | None= None
 
     def passwordMatch(self, entered: str) -> bool:
         """
         Check if the given phrase matches the login password.
         """
-        return hashlib.sha256((entered+self.__salt).encode()).hexdigest() == self.__password
+        try:
+            return hasherFor(self.__password).verify(entered, self.__salt, self.__password)
+        except ValueError:
+            return False
+
+    def needsRehash(self, hasher: _PasswordHasher) -> bool:
+        """
+        Returns True if the password wasn't hashed by the given hasher at its cost.
+        """
+        return hasher.needsRehash(self.__password)
+
+    def setPassword(self, password: str, hasher: _PasswordHasher):
+        """
+        Hashes and stores a new password, with a new salt.
+        """
+        salt= newSalt()
+        self.setHashedPassword(hasher.hash(password, salt), salt)
+
+    def setHashedPassword(self, hashed: str, salt: str):
+        """
+        Stores a password already hashed with the salt.
+        """
+        self.__salt= salt
+        self.__password= hashed
     
     def update(self, message: str):
         self.__messages.append(message)
 
-    def getNotifications(self):
-        return self.__messages
+    def follow(self, feed: EventLog):
+        """
+        Starts reading the events published to the feed from now on.
+        """
+        self.__feed= feed
+        self.__cursor= feed.latest()
+
+    def subscribe(self, *topics: str):
+        """
+        Only read events with one of the subscribed topics.
+        """
+        if self.__topics is None:
+            self.__topics= set()
+        self.__topics.update(topics)
+
+    def unsubscribe(self, *topics: str):
+        """
+        Stops reading events of the topics. Without topics, reads every event again.
+        """
+        if not topics:
+            self.__topics= None
+        elif self.__topics is not None:
+            self.__topics.difference_update(topics)
+
+    def getNotifications(self, limit: int= None) -> list[str]:
+        """
+        Returns up to limit unread notifications, oldest first, and marks
+        them as read. Returns all of them if limit is None.
+        """
+        messages= self.__messages[:limit]
+        del self.__messages[:len(messages)]
+        if self.__feed is not None and (limit is None or len(messages) < limit):
+            remaining= None if limit is None else limit - len(messages)
+            events, self.__cursor= self.__feed.read(self.__cursor, self.__topics, remaining)
+            messages.extend(events)
+        return messages
     
+    def toList(self) -> list[str]:
+        """
+        Returns a list object of the user's stored fields.
+        """
+        return [self.name, self.__password, self.__salt]
+
     @classmethod
     def parseUser(cls, row: list[str]) -> 'User':
         return cls(row[0], row[1], row[2])
\ No newline at end of file
@@ -0,0 +1,69 @@
+import argparse
+import csv
+import os
+import random
+from database.book import Genre
+from Users.hashing import PBKDF2Hasher
+
+_WORDS= ['Shadow', 'River', 'Empire', 'Garden', 'Winter', 'Storm', 'Silent', 'Golden', 'Night', 'Fire',
+         'Kingdom', 'Lost', 'Secret', 'House', 'Stone', 'Ocean', 'Crown', 'Forest', 'Iron', 'Glass']
+_NAMES= ['Anna', 'David', 'Maya', 'Noam', 'Lior', 'Sarah', 'Yosef', 'Tamar', 'Eitan', 'Ori']
+_SURNAMES= ['Cohen', 'Levi', 'Mizrahi', 'Peretz', 'Biton', 'Dahan', 'Avraham', 'Friedman', 'Katz', 'Shapiro']
+
+def bookRows(count: int, seed: int= 0) -> list[list[str]]:
+    """
+    Returns count distinct books.csv rows, the same for the same seed.
+    """
+    rng= random.Random(seed)
+    genres= [str(genre) for genre in Genre]
+    authors= [f'{rng.choice(_NAMES)} {rng.choice(_SURNAMES)} {i}' for i in range(max(1, count // 10))]
+    rows: list[list[str]]= []
+    for i in range(count):
+        copies= rng.randint(1, 5)
+        loaned= rng.randint(0, copies)
+        title= f'{rng.choice(_WORDS)} {rng.choice(_WORDS)} {i}'
+        rows.append([title, rng.choice(authors), 'Yes' if loaned == copies else 'No', str(copies),
+                     rng.choice(genres), str(rng.randint(1800, 2024)), str(loaned)])
+    return rows
+
+def userRows(count: int, seed: int= 0, iterations: int= 1000) -> list[list[str]]:
+    """
+    Returns count users.csv rows. User i is named user<i> with the
+    password password<i>, hashed with PBKDF2 at the given iterations.
+    """
+    rng= random.Random(seed)
+    hasher= PBKDF2Hasher(iterations)
+    rows: list[list[str]]= []
+    for i in range(count):
+        salt= f'{rng.getrandbits(64):016x}'
+        rows.append([f'user{i}', hasher.hash(f'password{i}', salt), salt])
+    return rows
+
+def generate(folder: str, books: int, users: int, seed: int= 0, iterations: int= 1000) -> tuple[str, str]:
+    """
+    Writes a synthetic books.csv and users.csv into the folder.
+    Returns their paths.
+    """
+    os.makedirs(folder, exist_ok=True)
+    bookfile= os.path.join(folder, 'books.csv')
+    userfile= os.path.join(folder, 'users.csv')
+    with open(bookfile, 'w', newline='') as f:
+        writer= csv.writer(f, delimiter=',')
+        writer.writerow(["title","author","is_loaned","copies","genre","year","loaned_copies"])
+        writer.writerows(bookRows(books, seed))
+    with open(userfile, 'w', newline='') as f:
+        writer= csv.writer(f, delimiter=',')
+        writer.writerow(["name","password","salt"])
+        writer.writerows(userRows(users, seed, iterations))
+    return bookfile, userfile
+
+if __name__ == '__main__':
+    parser= argparse.ArgumentParser(description="Generate a synthetic library.")
+    parser.add_argument('folder', help="folder to write books.csv and users.csv into")
+    parser.add_argument('--books', type=int, default=10_000, help="number of books")
+    parser.add_argument('--users', type=int, default=1_000, help="number of users")
+    parser.add_argument('--seed', type=int, default=0, help="random seed")
+    parser.add_argument('--iterations', type=int, default=1000, help="PBKDF2 iterations of the user passwords")
+    args= parser.parse_args()
+    generate(args.folder, args.books, args.users, args.seed, args.iterations)
+    print(f"Wrote {args.books} books and {args.users} users to {args.folder}.")
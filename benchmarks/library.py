@@ -0,0 +1,109 @@
+import argparse
+import json
+import os
+import platform
+import random
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable
+import database.library as library
+from database.book import BookFactory
+from database.storage import CSVStorage
+from Users.hashing import PBKDF2Hasher
+from benchmarks.generate import generate
+
+def measure(name: str, calls: list[Callable], results: dict):
+    """
+    Times each call and stores the stats under the name.
+    """
+    latencies: list[float]= []
+    for call in calls:
+        started= time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    total= sum(latencies)
+    results[name]= {
+        'ops': len(latencies),
+        'total_s': round(total, 6),
+        'mean_ms': round(total / len(latencies) * 1000, 4),
+        'p50_ms': round(latencies[len(latencies) // 2] * 1000, 4),
+        'p95_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 4),
+        'ops_per_s': round(len(latencies) / total, 1) if total else None,
+    }
+
+def bench(books: int, users: int, ops: int, seed: int, iterations: int) -> dict:
+    """
+    Runs every benchmark on a synthetic library. Returns the results by benchmark.
+    """
+    rng= random.Random(seed)
+    results: dict= {}
+    with tempfile.TemporaryDirectory() as folder:
+        bookfile, userfile= generate(folder, books, users, seed, iterations)
+        cwd= os.getcwd()
+        # the audit log and journal are written next to the data
+        os.chdir(folder)
+        try:
+            hasher= PBKDF2Hasher(iterations)
+            lib: library.Library= None
+            def load():
+                nonlocal lib
+                lib= library.Library(CSVStorage(bookfile, userfile), hasher=hasher)
+            measure('load', [load], results)
+            measure('index_build', [lambda: lib.searchBooklist('a', 'Title')], results)
+            catalog= library.BOOKS.toList()
+            measure('addBook', [
+                lambda i=i: lib.addBook(BookFactory.create_book_from_input(f'Benchmark Book {i}', 'Benchmark Author',
+                                                                           'Fiction', '2024'))
+                for i in range(ops)], results)
+            available= [book for book in catalog if book.availableCopies() > 0]
+            cycle= [rng.choice(available) for _ in range(ops)]
+            measure('borrowReturn', [
+                lambda book=book: (lib.borrowBook('benchmark', book), lib.returnBook('benchmark', book))
+                for book in cycle], results)
+            samples= [rng.choice(catalog) for _ in range(ops)]
+            queries= {
+                'Title': [book.title.split()[0].lower() for book in samples],
+                'Author': [book.author.split()[1] for book in samples],
+                'Genre': [str(book.genre)[:4] for book in samples],
+                'Year': [f'{book.year}-{book.year + 10}' for book in samples],
+            }
+            for searchby, values in queries.items():
+                measure(f'search{searchby}', [lambda q=q, s=searchby: lib.searchBooklist(q, s) for q in values], results)
+            for category in ('all', 'available', 'loaned', 'popular'):
+                measure(f'view_{category}', [lambda c=category: lib.viewBooklist(c)
+                                             for _ in range(max(1, ops // 100))], results)
+            logins= [rng.randrange(users) for _ in range(min(ops, users))]
+            measure('logInUser', [lambda i=i: lib.logInUser(f'user{i}', f'password{i}') for i in logins], results)
+            library.AUDIT.flush()
+            lib.close()
+        finally:
+            os.chdir(cwd)
+    return results
+
+if __name__ == '__main__':
+    parser= argparse.ArgumentParser(description="Benchmark the library's operations on synthetic catalogs.")
+    parser.add_argument('--books', type=int, nargs='+', default=[10_000, 100_000], help="catalog sizes")
+    parser.add_argument('--users', type=int, default=1_000, help="number of users")
+    parser.add_argument('--ops', type=int, default=200, help="calls per benchmark")
+    parser.add_argument('--seed', type=int, default=0, help="random seed")
+    parser.add_argument('--iterations', type=int, default=1000, help="PBKDF2 iterations of the user passwords")
+    parser.add_argument('--output', default='benchmark_results.json', help="JSON file to write the results to")
+    args= parser.parse_args()
+    report= {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'settings': {'users': args.users, 'ops': args.ops, 'seed': args.seed, 'iterations': args.iterations},
+        'runs': {},
+    }
+    for books in args.books:
+        results= bench(books, args.users, args.ops, args.seed, args.iterations)
+        report['runs'][str(books)]= results
+        print(f"{books} books")
+        for name, stats in results.items():
+            print(f"  {name:<16}{stats['mean_ms']:>12.3f} ms{stats['ops_per_s'] or 0:>14.1f} ops/s")
+    with open(args.output, 'w') as output:
+        json.dump(report, output, indent=2)
+    print(f"Wrote {args.output}.")
@@ -0,0 +1,48 @@
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from Users.hashing import _PasswordHasher, PBKDF2Hasher, ScryptHasher, SHA256Hasher, newSalt
+
+SETTINGS: list[_PasswordHasher]= [
+    SHA256Hasher(),
+    PBKDF2Hasher(100_000),
+    PBKDF2Hasher(300_000),
+    PBKDF2Hasher(600_000),
+    ScryptHasher(n=2**14),
+    ScryptHasher(n=2**15),
+]
+
+def describe(hasher: _PasswordHasher) -> str:
+    """
+    Returns the hasher's name and cost.
+    """
+    stored= hasher.hash('password', 'salt')
+    return '$'.join(stored.split('$')[:-1]) if '$' in stored else hasher.NAME
+
+def bench(hasher: _PasswordHasher, logins: int, workers: int) -> tuple[float, float]:
+    """
+    Returns the mean latency of one verification in milliseconds, and
+    the verifications per second reached with the worker pool.
+    """
+    salt= newSalt()
+    stored= hasher.hash('password', salt)
+    start= time.perf_counter()
+    for _ in range(logins):
+        hasher.verify('password', salt, stored)
+    latency= (time.perf_counter() - start) / logins * 1000
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        start= time.perf_counter()
+        list(pool.map(lambda _: hasher.verify('password', salt, stored), range(logins)))
+        throughput= logins / (time.perf_counter() - start)
+    return latency, throughput
+
+if __name__ == '__main__':
+    parser= argparse.ArgumentParser(description="Benchmark password verification at each cost setting.")
+    parser.add_argument('--logins', type=int, default=16, help="verifications per setting")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="verification pool size")
+    args= parser.parse_args()
+    print(f"{'hasher':<28}{'ms/login':>12}{'logins/s':>12}")
+    for hasher in SETTINGS:
+        latency, throughput= bench(hasher, args.logins, args.workers)
+        print(f"{describe(hasher):<28}{latency:>12.2f}{throughput:>12.1f}")
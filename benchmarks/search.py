@@ -0,0 +1,43 @@
+import argparse
+import os
+import time
+from database.book import BookFactory
+from database.shards import ShardedSearch
+from database.strategies import SearchByAuthor, SearchByGenre, SearchByTitle, SearchByYear
+from benchmarks.generate import bookRows
+
+QUERIES= [(SearchByTitle, 'title', 'shadow river'), (SearchByAuthor, 'author', 'cohen 1'),
+          (SearchByGenre, 'genre', 'fiction'), (SearchByYear, 'year', '19')]
+
+def bench(books: list, workers: int, partition: str, repeat: int) -> dict[str, tuple[float, float]]:
+    """
+    Returns the mean latency in milliseconds of each query, scanning in
+    this process and on the sharded workers.
+    """
+    results: dict[str, tuple[float, float]]= {}
+    with ShardedSearch(books, workers, partition) as shards:
+        for strategy, field, query in QUERIES:
+            shards.search(field, query)
+            start= time.perf_counter()
+            for _ in range(repeat):
+                strategy(books).search(query)
+            scan= (time.perf_counter() - start) / repeat * 1000
+            start= time.perf_counter()
+            for _ in range(repeat):
+                strategy(books, shards).search(query)
+            sharded= (time.perf_counter() - start) / repeat * 1000
+            results[field]= (scan, sharded)
+    return results
+
+if __name__ == '__main__':
+    parser= argparse.ArgumentParser(description="Compare a single-process search scan with sharded search.")
+    parser.add_argument('--books', type=int, default=200_000, help="catalog size")
+    parser.add_argument('--workers', type=int, nargs='+', default=[os.cpu_count() or 1], help="worker processes")
+    parser.add_argument('--partition', default='title', choices=['title', 'genre'])
+    parser.add_argument('--repeat', type=int, default=5, help="searches per query")
+    args= parser.parse_args()
+    books= [BookFactory.create_book_from_row(row) for row in bookRows(args.books)]
+    print(f"{'workers':>8} {'field':>8} {'scan ms':>10} {'sharded ms':>11}")
+    for workers in args.workers:
+        for field, (scan, sharded) in bench(books, workers, args.partition, args.repeat).items():
+            print(f"{workers:>8} {field:>8} {scan:>10.1f} {sharded:>11.1f}")
@@ -0,0 +1,125 @@
+import atexit
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any
+
+FLUSH_POLICIES= ('interval', 'fsync')
+
+class AuditLog:
+    """
+    A buffered log of the library's actions. Every action is one JSON
+    line with its timestamp, action, user, book and latency. Records are
+    buffered in memory and written by a background thread every
+    flushInterval seconds, or written and fsynced on every action with
+    the 'fsync' policy. The file is rotated to file.1, file.2, ... once
+    it is over maxBytes, or was written to for maxAge seconds.
+    """
+    def __init__(self, file: str= 'log.txt', flushPolicy: str= 'interval', flushInterval: float= 1.0,
+                 maxBytes: int= 10_000_000, maxAge: float= None, backups: int= 5):
+        if flushPolicy not in FLUSH_POLICIES:
+            raise ValueError(f"Unknown flush policy '{flushPolicy}'")
+        self.file= file
+        self.flushPolicy= flushPolicy
+        self.flushInterval= flushInterval
+        self.maxBytes= maxBytes
+        self.maxAge= maxAge
+        self.backups= backups
+        self.__buffer: list[str]= []
+        self.__lock= threading.Lock()
+        self.__stop= threading.Event()
+        self.__thread: threading.Thread | None= None
+        self.__opened= 0.0
+
+    def write(self, action: str, user: str= None, book: str= None, latency: float= None, **fields: Any):
+        """
+        Adds a record of an action. The latency is in seconds.
+        """
+        record= {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+            'action': action,
+            'user': user,
+            'book': book,
+            'latency_ms': None if latency is None else round(latency * 1000, 3),
+            **fields
+        }
+        line= json.dumps(record, ensure_ascii=False) + '\n'
+        with self.__lock:
+            self.__buffer.append(line)
+        if self.flushPolicy == 'fsync' or self.__stop.is_set():
+            self.flush()
+        elif self.__thread is None:
+            self.__start()
+
+    def __start(self):
+        """
+        Internal method to start the background flush thread.
+        """
+        with self.__lock:
+            if self.__thread is not None:
+                return
+            self.__thread= threading.Thread(target=self.__run, name='auditlog', daemon=True)
+            self.__thread.start()
+        atexit.register(self.close)
+
+    def __run(self):
+        """
+        Internal method that flushes the buffer until the log is closed.
+        """
+        while not self.__stop.wait(self.flushInterval):
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the buffered records to the file.
+        """
+        with self.__lock:
+            if not self.__buffer:
+                return
+            lines= ''.join(self.__buffer)
+            self.__buffer.clear()
+            if self.__shouldRotate():
+                self.__rotate()
+            with open(self.file, 'a', encoding='utf-8') as log:
+                log.write(lines)
+                if self.flushPolicy == 'fsync':
+                    log.flush()
+                    os.fsync(log.fileno())
+
+    def __shouldRotate(self) -> bool:
+        """
+        Internal method to check if the file is over its size or age.
+        """
+        try:
+            stat= os.stat(self.file)
+        except FileNotFoundError:
+            return False
+        if not self.__opened:
+            self.__opened= time.time()
+        if stat.st_size >= self.maxBytes:
+            return True
+        return self.maxAge is not None and time.time() - self.__opened >= self.maxAge
+
+    def __rotate(self):
+        """
+        Internal method to shift the file to file.1, dropping the oldest backup.
+        """
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f'{self.file}.{i}'):
+                os.replace(f'{self.file}.{i}', f'{self.file}.{i + 1}')
+        if self.backups:
+            os.replace(self.file, f'{self.file}.1')
+        else:
+            os.remove(self.file)
+        self.__opened= time.time()
+
+    def close(self):
+        """
+        Stops the flush thread and writes what is left in the buffer.
+        """
+        self.__stop.set()
+        if self.__thread is not None and self.__thread is not threading.current_thread():
+            self.__thread.join()
+        self.flush()
@@ -0,0 +1,44 @@
+import json
+import os
+import tempfile
+import unittest
+from database.auditlog import AuditLog
+
+class TestAuditLog(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.dir.name, "log.txt")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def read(self, file: str) -> list[dict]:
+        with open(file) as f:
+            return [json.loads(line) for line in f]
+
+    def test_fsync_policy(self):
+        log = AuditLog(self.file, flushPolicy="fsync")
+        log.write("book borrowed successfully", "user1", "Test Book", 0.002)
+        record = self.read(self.file)[0]
+        self.assertEqual(record["action"], "book borrowed successfully")
+        self.assertEqual(record["user"], "user1")
+        self.assertEqual(record["latency_ms"], 2.0)
+
+    def test_buffered_until_flush(self):
+        log = AuditLog(self.file, flushInterval=60)
+        log.write("logged in successfully", "user1")
+        self.assertFalse(os.path.exists(self.file))
+        log.close()
+        self.assertEqual(len(self.read(self.file)), 1)
+
+    def test_rotation(self):
+        log = AuditLog(self.file, flushPolicy="fsync", maxBytes=1, backups=2)
+        for i in range(4):
+            log.write(f"action {i}")
+        self.assertEqual(self.read(self.file)[0]["action"], "action 3")
+        self.assertEqual(self.read(self.file + ".1")[0]["action"], "action 2")
+        self.assertFalse(os.path.exists(self.file + ".3"))
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            AuditLog(self.file, flushPolicy="never")
@@ -1,4 +1,6 @@
+from collections import deque
 from enum import Enum, auto
+from typing import Iterable, Iterator
 
 class Genre(Enum):
     """
@@ -28,18 +30,129 @@ class Genre(Enum):
     @classmethod
     def parseGenre(cls, obj: str) -> 'Genre':
         """
-        A method that parses a string into a Genre object.
+        A method that parses a string into a Genre object. Case,
+        underscores, dashes and the aliases in GENRE_ALIASES are ignored.
         """
-        for genre in Genre:
-            if genre.__str__() == obj:
-                return genre
-        raise ValueError(f"No genre matching '{obj}' found")
+        genre = _GENRE_NAMES.get(obj)
+        if genre is None:
+            genre = _GENRE_NAMES.get(Genre._normalize(obj))
+        if genre is None:
+            raise ValueError(f"No genre matching '{obj}' found")
+        return genre
+
+    @staticmethod
+    def _normalize(name: str) -> str:
+        """
+        Returns the name lowercased, with dashes and underscores as spaces.
+        """
+        return ' '.join(str(name).lower().replace('_', ' ').replace('-', ' ').split())
+
+# other spellings accepted for the genres
+GENRE_ALIASES: dict[str, Genre] = {
+    'sci fi': Genre.SCIENCE_FICTION,
+    'scifi': Genre.SCIENCE_FICTION,
+    'historical': Genre.HISTORICAL_FICTION,
+    'gothic': Genre.GOTHIC_FICTION,
+    'dystopia': Genre.DYSTOPIAN,
+    'classics': Genre.CLASSIC,
+    'epic': Genre.EPIC_POETRY,
+}
+
+# every accepted spelling of a genre, looked up instead of looping over Genre
+_GENRE_NAMES: dict[str, Genre] = {}
+for _genre in Genre:
+    _GENRE_NAMES[str(_genre)] = _genre
+    _GENRE_NAMES[Genre._normalize(_genre.name)] = _genre
+for _alias, _genre in GENRE_ALIASES.items():
+    _GENRE_NAMES[Genre._normalize(_alias)] = _genre
+del _alias, _genre
+
+class WaitingList:
+    """
+    A first-in first-out queue of the users waiting for a book. Names
+    are queued in a deque and kept in a dict by their lowercased form,
+    so joining, leaving, taking the next user and checking if a user is
+    waiting are all O(1). A user who leaves stays in the deque until it
+    is taken from or compacted, and is skipped there.
+    """
+    __slots__ = ('__queue', '__members', '__next')
+
+    def __init__(self, names: Iterable[str]= ()):
+        # (ticket, name) pairs, a pair is stale if its ticket was dropped
+        self.__queue: deque[tuple[int, str]]= deque()
+        self.__members: dict[str, int]= {}
+        self.__next= 0
+        for name in names:
+            self.add(name)
+
+    @staticmethod
+    def _normalize(name: str) -> str:
+        """
+        Returns the form of the name users are compared by.
+        """
+        return name.strip().lower()
+
+    def __contains__(self, name: str) -> bool:
+        return WaitingList._normalize(name) in self.__members
+
+    def __len__(self) -> int:
+        return len(self.__members)
+
+    def __iter__(self) -> Iterator[str]:
+        for ticket, name in self.__queue:
+            if self.__members.get(WaitingList._normalize(name)) == ticket:
+                yield name
+
+    def add(self, name: str) -> bool:
+        """
+        Adds the user to the end of the queue. Returns False if they were already waiting.
+        """
+        if name in self:
+            return False
+        self.__members[WaitingList._normalize(name)]= self.__next
+        self.__queue.append((self.__next, name))
+        self.__next+=1
+        return True
+
+    def remove(self, name: str):
+        """
+        Removes the user from the queue.
+        """
+        if name not in self:
+            raise ValueError(f"'{name}' isn't waiting for the book")
+        del self.__members[WaitingList._normalize(name)]
+        # drop the stale entries once they are most of the queue
+        if len(self.__queue) > 2 * len(self.__members) + 16:
+            self.__queue= deque(entry for entry in self.__queue
+                                if self.__members.get(WaitingList._normalize(entry[1])) == entry[0])
+
+    def pop(self) -> str:
+        """
+        Removes and returns the user first in line.
+        """
+        while self.__queue:
+            ticket, name= self.__queue.popleft()
+            if self.__members.get(WaitingList._normalize(name)) == ticket:
+                del self.__members[WaitingList._normalize(name)]
+                return name
+        raise IndexError("Nobody is waiting for the book")
+
+    def toList(self) -> list[str]:
+        """
+        Returns the waiting users, first in line first.
+        """
+        return list(self)
 
 class Book:
     """
     A class representing a book. Contains the title, genre,
     author, year, and other info.
+
+    Books use __slots__ instead of an instance dict, and the waiting
+    list is only created once somebody waits for the book.
     """
+    __slots__ = ('title', 'author', 'loaned', 'copies', 'genre', 'year', 'loaned_copies', '__waiting_list')
+
     def __init__(self, title: str, author: str, is_loaned: bool, copies: int, genre: Genre, year: int):
         self.title = title
         self.author = author
@@ -47,26 +160,78 @@ class Book:
         self.copies = copies
         self.genre = genre
         self.year = year
-        self.__waiting_list: list[str]= []
+        self.loaned_copies = copies if is_loaned else 0
+        self.__waiting_list: WaitingList | None= None
 
-    def addToWaitingList(self, loaner: str):
+    def addToWaitingList(self, loaner: str) -> bool:
         """
-        Add a user to the book's waiting list.
+        Add a user to the end of the book's waiting list.
+        Returns False if they were already waiting.
         """
-        self.__waiting_list.append(loaner)
+        if self.__waiting_list is None:
+            self.__waiting_list= WaitingList()
+        return self.__waiting_list.add(loaner)
 
     def removeFromWaitingList(self, loaner: str):
         """
-        Clears the waiting list for the book.
+        Removes a user from the book's waiting list.
         """
+        if self.__waiting_list is None:
+            raise ValueError(f"'{loaner}' isn't waiting for the book")
         self.__waiting_list.remove(loaner)
+        if not self.__waiting_list:
+            self.__waiting_list= None
+
+    def popWaitingList(self) -> str:
+        """
+        Removes and returns the user first in line for the book.
+        """
+        if self.__waiting_list is None:
+            raise IndexError("Nobody is waiting for the book")
+        loaner= self.__waiting_list.pop()
+        if not self.__waiting_list:
+            self.__waiting_list= None
+        return loaner
+
+    def isWaiting(self, loaner: str) -> bool:
+        """
+        Returns True if the user is on the book's waiting list.
+        """
+        return self.__waiting_list is not None and loaner in self.__waiting_list
+
+    def waitingCount(self) -> int:
+        """
+        Returns the number of users waiting for the book.
+        """
+        return 0 if self.__waiting_list is None else len(self.__waiting_list)
 
     def getWaitingList(self) -> list[str]:
         """
-        Get a list of users waiting for the book.
+        Get a list of users waiting for the book, first in line first.
+        """
+        if self.__waiting_list is None:
+            return []
+        return self.__waiting_list.toList()
+
+    def availableCopies(self) -> int:
+        """
+        Returns the number of copies that aren't loaned.
         """
-        return self.__waiting_list
+        return self.copies - self.loaned_copies
+
+    def key(self) -> tuple:
+        """
+        Returns the fields that identify the book.
+        """
+        return (self.title, self.author, self.genre, self.year)
     
+    @classmethod
+    def rowKey(cls, row: list[str]) -> tuple:
+        """
+        Returns the key of the book in a csv row, without creating the book.
+        """
+        return (row[0], row[1], Genre.parseGenre(row[4]), int(row[5]))
+
     @classmethod
     def _yesNoBool(cls, string: str) -> bool:
         """
@@ -98,13 +263,47 @@ class Book:
             self.year
         ]
     
+    def toRow(self) -> list[str]:
+        """
+        Returns the book's csv row, which also holds the number of loaned copies.
+        """
+        return self.toList() + [self.loaned_copies]
+
     def __eq__(self, other: 'Book') -> bool:
-        return self.title == other.title and self.author == other.author and str(self.genre) == str(other.genre) and self.year == other.year
+        if not isinstance(other, Book):
+            return NotImplemented
+        return self.key() == other.key()
+
+    def __hash__(self) -> int:
+        return hash(self.key())
+
+class BookChange:
+    """
+    A record of an action made on a book. Holds the book's copies,
+    loaned copies and loaned flag before and after the action, instead
+    of copies of the book itself. A state is None when the book wasn't
+    in the library before the action, or isn't after it.
+    """
+    __slots__ = ('action', 'book', 'old', 'new')
+
+    def __init__(self, action: str, book: Book, old: tuple[int, int, bool] | None, new: tuple[int, int, bool] | None):
+        self.action = action
+        self.book = book
+        self.old = old
+        self.new = new
+
+    @staticmethod
+    def state(book: Book) -> tuple[int, int, bool]:
+        """
+        Returns the part of a book's state that actions change.
+        """
+        return (book.copies, book.loaned_copies, book.loaned)
 
 class GenreBook(Book):
     """
     Base class for genre-specific books.
     """
+    __slots__ = ()
     GENRE = None
     
     @classmethod
@@ -115,56 +314,76 @@ class GenreBook(Book):
         return cls(l[0], l[1], Book._yesNoBool(l[2]), int(l[3]), cls.GENRE, int(l[4]))
 
 class FictionBook(GenreBook):
+    __slots__ = ()
     GENRE = Genre.FICTION
 
 class DystopianBook(GenreBook):
+    __slots__ = ()
     GENRE = Genre.DYSTOPIAN
 
 class ClassicBook(GenreBook):
+    __slots__ = ()
     GENRE = Genre.CLASSIC
 
 class AdventureBook(GenreBook):
+    __slots__ = ()
     GENRE = Genre.ADVENTURE
 
 class RomanceBook(GenreBook):
+    __slots__ = ()
     GENRE = Genre.ROMANCE
 
 class HistoricalFictionBook(GenreBook):
+    __slots__ = ()
     GENRE = Genre.HISTORICAL_FICTION
 
 class PsychologicalDramaBook(GenreBook):
+    __slots__ = ()
     GENRE = Genre.PSYCHOLOGICAL_DRAMA
 
 class PhilosophyBook(GenreBook):
+    __slots__ = ()
     GENRE = Genre.PHILOSOPHY
 
 class EpicPoetryBook(GenreBook):
+    __slots__ = ()
     GENRE = Genre.EPIC_POETRY
 
 class GothicFictionBook(GenreBook):
+    __slots__ = ()
     GENRE = Genre.GOTHIC_FICTION
 
 class GothicRomanceBook(GenreBook):
+    __slots__ = ()
     GENRE = Genre.GOTHIC_ROMANCE
 
 class RealismBook(GenreBook):
+    __slots__ = ()
     GENRE = Genre.REALISM
 
 class ModernismBook(GenreBook):
+    __slots__ = ()
     GENRE = Genre.MODERNISM
 
 class SatireBook(GenreBook):
+    __slots__ = ()
     GENRE = Genre.SATIRE
 
 class ScienceFictionBook(GenreBook):
+    __slots__ = ()
     GENRE = Genre.SCIENCE_FICTION
 
 class TragedyBook(GenreBook):
+    __slots__ = ()
     GENRE = Genre.TRAGEDY
 
 class FantasyBook(GenreBook):
+    __slots__ = ()
     GENRE = Genre.FANTASY
 
+# the book class of every genre
+GENRE_CLASSES: dict[Genre, type[GenreBook]] = {cls.GENRE: cls for cls in GenreBook.__subclasses__()}
+
 class BookFactory:
     """
     Factory class for creating Book objects.
@@ -174,26 +393,7 @@ class BookFactory:
         """
         Internal method for book creation.
         """
-        genre_class_dict = {
-            Genre.FICTION: FictionBook,
-            Genre.DYSTOPIAN: DystopianBook,
-            Genre.CLASSIC: ClassicBook,
-            Genre.ADVENTURE: AdventureBook,
-            Genre.ROMANCE: RomanceBook,
-            Genre.HISTORICAL_FICTION: HistoricalFictionBook,
-            Genre.PSYCHOLOGICAL_DRAMA: PsychologicalDramaBook,
-            Genre.PHILOSOPHY: PhilosophyBook,
-            Genre.EPIC_POETRY: EpicPoetryBook,
-            Genre.GOTHIC_FICTION: GothicFictionBook,
-            Genre.GOTHIC_ROMANCE: GothicRomanceBook,
-            Genre.REALISM: RealismBook,
-            Genre.MODERNISM: ModernismBook,
-            Genre.SATIRE: SatireBook,
-            Genre.SCIENCE_FICTION: ScienceFictionBook,
-            Genre.TRAGEDY: TragedyBook,
-            Genre.FANTASY: FantasyBook
-        }
-        return genre_class_dict[genre].parseBook([title, author, is_loaned, copies, year])
+        return GENRE_CLASSES[genre].parseBook([title, author, is_loaned, copies, year])
 
     @classmethod
     def create_book_from_input(cls, title: str, author: str, genre: str, year: str, is_loaned: str= "No", copies: str= 1) -> Book:
@@ -206,7 +406,11 @@ class BookFactory:
     @classmethod
     def create_book_from_row(cls, row: list) -> Book:
         """
-        Create book from existing row.
+        Create book from existing row. If the row has a loaned copies
+        column, it is used instead of the is_loaned field.
         """
         genre = Genre.parseGenre(row[4])
-        return cls.create_book(row[0], row[1], row[2], row[3], genre, row[5])
\ No newline at end of file
+        book = cls.create_book(row[0], row[1], row[2], row[3], genre, row[5])
+        if len(row) > 6:
+            book.loaned_copies = int(row[6])
+        return book
\ No newline at end of file
@@ -1,5 +1,5 @@
 import unittest
-from book import BookFactory, Genre, Book, FictionBook, RomanceBook
+from book import BookFactory, Genre, Book, FictionBook, RomanceBook, WaitingList
 
 class TestBookFactory(unittest.TestCase):
     def test_create_book_from_input(self):
@@ -30,6 +30,11 @@ class TestGenre(unittest.TestCase):
         self.assertEqual(Genre.parseGenre("Historical Fiction"), Genre.HISTORICAL_FICTION)
         self.assertEqual(Genre.parseGenre("Science Fiction"), Genre.SCIENCE_FICTION)
     
+    def test_genre_parsing_spellings(self):
+        self.assertEqual(Genre.parseGenre("science fiction"), Genre.SCIENCE_FICTION)
+        self.assertEqual(Genre.parseGenre("HISTORICAL_FICTION"), Genre.HISTORICAL_FICTION)
+        self.assertEqual(Genre.parseGenre("Sci-Fi"), Genre.SCIENCE_FICTION)
+    
     def test_invalid_genre_parsing(self):
         with self.assertRaises(ValueError):
             Genre.parseGenre("Invalid Genre")            
@@ -51,11 +56,35 @@ class TestBook(unittest.TestCase):
         
         self.assertEqual(Book._boolYesNo(True), "Yes")
         self.assertEqual(Book._boolYesNo(False), "No")
+
+    def test_compact_layout(self):
+        book = BookFactory.create_book_from_input("Title", "Author", "Fiction", "2023")
+        self.assertFalse(hasattr(book, "__dict__"))
+        with self.assertRaises(AttributeError):
+            book.extra = 1
     
     def test_to_list(self):
         expected = ["Test Title", "Test Author", "No", 1, "Fiction", 2023]
         self.assertEqual(self.book.toList(), expected)
 
+class TestWaitingList(unittest.TestCase):
+    def test_queue_order(self):
+        waiting = WaitingList(["user1", "user2", "user3"])
+        self.assertFalse(waiting.add("USER1"))
+        waiting.remove("user2")
+        self.assertIn("User3", waiting)
+        self.assertEqual(waiting.pop(), "user1")
+        self.assertEqual(waiting.toList(), ["user3"])
+        self.assertEqual(len(waiting), 1)
+
+    def test_rejoin(self):
+        waiting = WaitingList(["user1", "user2"])
+        waiting.remove("user1")
+        waiting.add("user1")
+        self.assertEqual(waiting.toList(), ["user2", "user1"])
+        with self.assertRaises(ValueError):
+            waiting.remove("user3")
+
 class TestGenreBook(unittest.TestCase):
     def test_fiction_book_creation(self):
         book_data = ["Title", "Author", "No", "1", "2023"]
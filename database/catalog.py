@@ -0,0 +1,259 @@
+import threading
+from typing import Callable, Iterable, Iterator
+from database.book import Book, BookFactory
+from database.indexes import _CatalogIndex
+
+class Catalog:
+    """
+    A hash-keyed store of books. Books are keyed by the same
+    (title, author, genre, year) identity that Book.__eq__ uses,
+    so lookup, membership and updates don't scan the whole list.
+    The insertion order of the books is kept, and indexes added to
+    the catalog are updated along with it. The generation grows with
+    every change, so callers can tell if what they read is still valid.
+
+    Books loaded with addRows are kept as their csv row, and only made
+    into Book objects when they are first accessed. Indexes are filled
+    the first time they are used.
+    """
+    def __init__(self, books: list[Book]= None):
+        self.__books: dict[tuple, Book | tuple]= {}
+        self.__positions: dict[tuple, int]= {}
+        self.__next= 0
+        self.__indexes: dict[str, _CatalogIndex]= {}
+        self.__built: set[str]= set()
+        # guards creating books and filling indexes on first use
+        self.__lazyLock= threading.RLock()
+        self.generation= 0
+        if books:
+            for book in books:
+                self.add(book)
+
+    def __contains__(self, book: Book) -> bool:
+        return book.key() in self.__books
+
+    def __iter__(self) -> Iterator[Book]:
+        for key, book in self.__books.items():
+            yield book if isinstance(book, Book) else self.__materialize(key)
+
+    def __len__(self) -> int:
+        return len(self.__books)
+
+    def __materialize(self, key: tuple) -> Book:
+        """
+        Internal method to get the Book of a key, creating it from its
+        row if it wasn't accessed yet.
+        """
+        book= self.__books[key]
+        if isinstance(book, Book):
+            return book
+        with self.__lazyLock:
+            # another thread may have created it meanwhile
+            book= self.__books[key]
+            if not isinstance(book, Book):
+                book= BookFactory.create_book_from_row(list(book))
+                self.__books[key]= book
+            return book
+
+    def __builtIndexes(self) -> Iterator[_CatalogIndex]:
+        """
+        Internal method to get the indexes that were already filled.
+        """
+        return (self.__indexes[field] for field in self.__built)
+
+    def get(self, book: Book) -> Book:
+        """
+        Returns the stored book equal to the given one.
+        """
+        if book not in self:
+            raise ValueError("Book doesn't exist.")
+        return self.__materialize(book.key())
+
+    def add(self, book: Book):
+        """
+        Adds a new book to the catalog.
+        """
+        if book in self:
+            raise ValueError("Book already exists.")
+        self.__books[book.key()]= book
+        self.__positions[book.key()]= self.__next
+        self.__next+=1
+        for index in self.__builtIndexes():
+            index.add(book)
+        self.generation+=1
+
+    def addRows(self, rows: Iterable[list[str]]):
+        """
+        Adds books from csv rows without creating their Book objects yet.
+        """
+        for row in rows:
+            key= Book.rowKey(row)
+            if key in self.__books:
+                raise ValueError("Book already exists.")
+            if self.__built:
+                self.__books[key]= BookFactory.create_book_from_row(row)
+                for index in self.__builtIndexes():
+                    index.add(self.__books[key])
+            else:
+                self.__books[key]= tuple(row)
+            self.__positions[key]= self.__next
+            self.__next+=1
+        self.generation+=1
+
+    def remove(self, book: Book):
+        """
+        Removes a book from the catalog.
+        """
+        book= self.get(book)
+        del self.__books[book.key()]
+        del self.__positions[book.key()]
+        for index in self.__builtIndexes():
+            index.remove(book)
+        self.generation+=1
+
+    def replace(self, oldBook: Book, newBook: Book):
+        """
+        Replaces a stored book with a new one, keeping its position.
+        """
+        if oldBook.key() != newBook.key() and newBook in self:
+            raise ValueError("Book already exists.")
+        stored= self.get(oldBook)
+        self.__positions[newBook.key()]= self.__positions.pop(oldBook.key())
+        for index in self.__builtIndexes():
+            index.remove(stored)
+            index.add(newBook)
+        self.generation+=1
+        if oldBook.key() == newBook.key():
+            self.__books[newBook.key()]= newBook
+            return
+        # the key changed, so rebuild the order around it
+        books: dict[tuple, Book | tuple]= {}
+        for key, book in self.__books.items():
+            if key == oldBook.key():
+                books[newBook.key()]= newBook
+            else:
+                books[key]= book
+        self.__books= books
+
+    def clear(self):
+        """
+        Removes all books from the catalog.
+        """
+        self.__books.clear()
+        self.__positions.clear()
+        self.__next= 0
+        for index in self.__builtIndexes():
+            index.clear()
+        self.__built.clear()
+        self.generation+=1
+
+    def addIndex(self, index: _CatalogIndex):
+        """
+        Adds an index over one of the books' fields. It is filled with
+        the catalog's books the first time it is used.
+        """
+        index.clear()
+        self.__indexes[index.field]= index
+        self.__built.discard(index.field)
+
+    def removeIndex(self, field: str):
+        """
+        Removes the catalog's index over the given field.
+        """
+        self.__indexes.pop(field, None)
+        self.__built.discard(field)
+
+    def update(self, book: Book):
+        """
+        Tells the indexes that a stored book was changed in place.
+        """
+        book= self.get(book)
+        with self.__lazyLock:
+            for index in self.__builtIndexes():
+                index.update(book)
+            self.generation+=1
+
+    def getIndex(self, field: str) -> _CatalogIndex:
+        """
+        Returns the catalog's index over the given field.
+        """
+        index= self.__indexes[field]
+        if field not in self.__built:
+            with self.__lazyLock:
+                if field not in self.__built:
+                    for book in self:
+                        index.add(book)
+                    self.__built.add(field)
+        return index
+
+    def hasIndex(self, field: str) -> bool:
+        """
+        Returns True if the catalog has an index over the given field.
+        """
+        return field in self.__indexes
+
+    def search(self, field: str, query: str) -> list[Book]:
+        """
+        Returns the books the field's index matches with the query,
+        in catalog order.
+        """
+        matches= self.getIndex(field).search(query)
+        return sorted(matches, key=lambda book: self.__positions[book.key()])
+
+    def position(self, book: Book) -> int:
+        """
+        Returns a number that orders the book among the catalog's books.
+        """
+        return self.__positions[book.key()]
+
+    def view(self, predicate: Callable[[Book], bool]) -> 'CatalogView':
+        """
+        Returns a live view of the books matching the predicate.
+        """
+        return CatalogView(self, predicate)
+
+    def toList(self) -> list[Book]:
+        """
+        Returns a list of all the books in the catalog.
+        """
+        return list(self)
+
+    def rows(self) -> Iterator[list[str]]:
+        """
+        Yields the csv row of every book, without creating the ones
+        that weren't accessed.
+        """
+        for book in self.__books.values():
+            yield book.toRow() if isinstance(book, Book) else list(book)
+
+class CatalogView:
+    """
+    A filtered view over a Catalog. Holds no books of its own, so it
+    is always in sync with the catalog it was made from.
+    """
+    def __init__(self, catalog: Catalog, predicate: Callable[[Book], bool]):
+        self.__catalog= catalog
+        self.__predicate= predicate
+
+    def __contains__(self, book: Book) -> bool:
+        return book in self.__catalog and self.__predicate(self.__catalog.get(book))
+
+    def __iter__(self) -> Iterator[Book]:
+        return (book for book in self.__catalog if self.__predicate(book))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def get(self, book: Book) -> Book:
+        """
+        Returns the stored book equal to the given one, if it is in the view.
+        """
+        if book not in self:
+            raise ValueError("Book doesn't exist.")
+        return self.__catalog.get(book)
+
+    def toList(self) -> list[Book]:
+        """
+        Returns a list of all the books in the view.
+        """
+        return list(self)
@@ -0,0 +1,43 @@
+import unittest
+from database.catalog import Catalog
+from database.book import Book, Genre
+
+class TestCatalog(unittest.TestCase):
+    def setUp(self):
+        self.books = [
+            Book("Test1", "Author1", False, 2, Genre.FICTION, 2023),
+            Book("Test2", "Author2", True, 1, Genre.ROMANCE, 2023)
+        ]
+        self.catalog = Catalog(self.books)
+
+    def test_lookup(self):
+        copy = Book("Test1", "Author1", False, 5, Genre.FICTION, 2023)
+        self.assertIn(copy, self.catalog)
+        self.assertIs(self.catalog.get(copy), self.books[0])
+        self.assertEqual(hash(copy), hash(self.books[0]))
+
+    def test_duplicate_and_missing(self):
+        with self.assertRaises(ValueError):
+            self.catalog.add(Book("Test1", "Author1", False, 1, Genre.FICTION, 2023))
+        with self.assertRaises(ValueError):
+            self.catalog.remove(Book("Test3", "Author3", False, 1, Genre.FICTION, 2023))
+
+    def test_replace_keeps_order(self):
+        new = Book("Renamed", "Author1", False, 2, Genre.FICTION, 2023)
+        self.catalog.replace(self.books[0], new)
+        self.assertEqual([book.title for book in self.catalog], ["Renamed", "Test2"])
+
+    def test_views(self):
+        available = self.catalog.view(lambda book: book.availableCopies() > 0)
+        self.assertEqual(available.toList(), [self.books[0]])
+        self.books[1].loaned_copies = 0
+        self.assertEqual(len(available), 2)
+
+    def test_lazy_rows(self):
+        catalog = Catalog()
+        catalog.addRows([["Test3", "Author3", "No", "2", "Fiction", "2020", "1"]])
+        self.assertEqual(list(catalog.rows()), [["Test3", "Author3", "No", "2", "Fiction", "2020", "1"]])
+        book = catalog.get(Book("Test3", "Author3", False, 2, Genre.FICTION, 2020))
+        self.assertEqual(book.loaned_copies, 1)
+        book.loaned_copies = 2
+        self.assertEqual(list(catalog.rows())[0][6], 2)
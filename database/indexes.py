@@ -0,0 +1,317 @@
+import bisect
+import re
+from abc import ABC, abstractmethod
+from typing import Callable, Iterable
+from database.book import Book, Genre
+
+class _CatalogIndex(ABC):
+    """
+    Base interface for indexes kept in sync with a Catalog.
+    """
+    def __init__(self, field: str):
+        self.field= field
+
+    @abstractmethod
+    def add(self, book: Book):
+        """
+        Indexes a book added to the catalog.
+        """
+        pass
+
+    @abstractmethod
+    def remove(self, book: Book):
+        """
+        Drops a book removed from the catalog.
+        """
+        pass
+
+    @abstractmethod
+    def clear(self):
+        """
+        Drops all the books from the index.
+        """
+        pass
+
+    def update(self, book: Book):
+        """
+        Reindexes a book that was changed in place.
+        """
+        pass
+
+class _SearchIndex(_CatalogIndex):
+    """
+    Base interface for indexes that answer search queries.
+    """
+    @abstractmethod
+    def search(self, query: str) -> Iterable[Book]:
+        """
+        Returns the indexed books matching the query, in no particular order.
+        """
+        pass
+
+class TextIndex(_SearchIndex):
+    """
+    Inverted index over a text field of the books. Every lowercased
+    substring of up to 3 characters has a posting set of the books
+    holding it, so a longer substring query intersects the postings of
+    its trigrams instead of scanning every book.
+    """
+    GRAM= 3
+
+    def __init__(self, field: str):
+        super().__init__(field)
+        self.__postings: dict[str, set[Book]]= {}
+
+    @classmethod
+    def _grams(cls, text: str, size: int) -> set[str]:
+        """
+        Returns the substrings of the given size in the text.
+        """
+        return {text[i:i+size] for i in range(len(text) - size + 1)}
+
+    def __value(self, book: Book) -> str:
+        """
+        Internal method to get the normalized value of the indexed field.
+        """
+        return str(getattr(book, self.field)).lower()
+
+    def add(self, book: Book):
+        value= self.__value(book)
+        # size 0 indexes the empty query, which matches every book
+        for size in range(0, TextIndex.GRAM + 1):
+            for gram in TextIndex._grams(value, size):
+                self.__postings.setdefault(gram, set()).add(book)
+
+    def remove(self, book: Book):
+        value= self.__value(book)
+        for size in range(0, TextIndex.GRAM + 1):
+            for gram in TextIndex._grams(value, size):
+                posting= self.__postings.get(gram)
+                if posting is not None:
+                    posting.discard(book)
+                    if not posting:
+                        del self.__postings[gram]
+
+    def clear(self):
+        self.__postings.clear()
+
+    def search(self, query: str) -> Iterable[Book]:
+        query= query.lower()
+        # short queries are indexed as they are
+        if len(query) <= TextIndex.GRAM:
+            return self.__postings.get(query, set())
+        postings= [self.__postings.get(gram) for gram in TextIndex._grams(query, TextIndex.GRAM)]
+        if not all(postings):
+            return set()
+        postings.sort(key=len)
+        candidates= postings[0].intersection(*postings[1:])
+        # the trigrams can match out of order, so check the candidates
+        return {book for book in candidates if query in self.__value(book)}
+
+class GenreIndex(_SearchIndex):
+    """
+    Buckets the books by genre. A query is matched against the genre
+    names once, instead of against every book's genre.
+    """
+    def __init__(self, field: str= 'genre'):
+        super().__init__(field)
+        self.__names: dict[Genre, str]= {genre: str(genre).lower() for genre in Genre}
+        self.__buckets: dict[Genre, set[Book]]= {genre: set() for genre in Genre}
+
+    def add(self, book: Book):
+        self.__buckets[getattr(book, self.field)].add(book)
+
+    def remove(self, book: Book):
+        self.__buckets[getattr(book, self.field)].discard(book)
+
+    def clear(self):
+        for bucket in self.__buckets.values():
+            bucket.clear()
+
+    def bucket(self, genre: Genre) -> set[Book]:
+        """
+        Returns the books of the given genre.
+        """
+        return self.__buckets[genre]
+
+    def search(self, query: str) -> Iterable[Book]:
+        query= query.lower()
+        matches: set[Book]= set()
+        for genre, name in self.__names.items():
+            if query in name:
+                matches.update(self.__buckets[genre])
+        return matches
+
+class YearIndex(_SearchIndex):
+    """
+    Buckets the books by year, and keeps the years sorted so ranges
+    are found with bisect. A query like '1900-1950' is a range, any
+    other query matches the years holding it, like the other searches.
+    """
+    RANGE= re.compile(r'^\s*(-?\d+)\s*-\s*(-?\d+)\s*$')
+
+    def __init__(self, field: str= 'year'):
+        super().__init__(field)
+        self.__years: list[int]= []
+        self.__buckets: dict[int, set[Book]]= {}
+
+    def add(self, book: Book):
+        year= getattr(book, self.field)
+        if year not in self.__buckets:
+            bisect.insort(self.__years, year)
+            self.__buckets[year]= set()
+        self.__buckets[year].add(book)
+
+    def remove(self, book: Book):
+        year= getattr(book, self.field)
+        bucket= self.__buckets.get(year)
+        if bucket is None:
+            return
+        bucket.discard(book)
+        if not bucket:
+            del self.__buckets[year]
+            del self.__years[bisect.bisect_left(self.__years, year)]
+
+    def clear(self):
+        self.__years.clear()
+        self.__buckets.clear()
+
+    def exact(self, year: int) -> set[Book]:
+        """
+        Returns the books released in the given year.
+        """
+        return self.__buckets.get(year, set())
+
+    def between(self, start: int, end: int) -> set[Book]:
+        """
+        Returns the books released between the given years, inclusive.
+        """
+        matches: set[Book]= set()
+        first= bisect.bisect_left(self.__years, start)
+        last= bisect.bisect_right(self.__years, end)
+        for year in self.__years[first:last]:
+            matches.update(self.__buckets[year])
+        return matches
+
+    def search(self, query: str) -> Iterable[Book]:
+        yearrange= YearIndex.RANGE.match(query)
+        if yearrange:
+            return self.between(int(yearrange.group(1)), int(yearrange.group(2)))
+        matches: set[Book]= set()
+        for year in self.__years:
+            if query in str(year):
+                matches.update(self.__buckets[year])
+        return matches
+
+class PopularityIndex(_CatalogIndex):
+    """
+    Ranks the books by a popularity score. The ranking stays sorted as
+    books are borrowed, returned and waited for, so the most popular
+    books are sliced off its top instead of sorting every book.
+    Books with no score aren't ranked, and ties keep catalog order.
+    """
+    def __init__(self, field: str, score: Callable[[Book], int]):
+        super().__init__(field)
+        self.score= score
+        self.__ranking: list[tuple[int, int, Book]]= []
+        self.__entries: dict[Book, tuple[int, int]]= {}
+        self.__order: dict[Book, int]= {}
+        self.__next= 0
+
+    def __place(self, book: Book):
+        """
+        Internal method to insert a book into the ranking by its current score.
+        """
+        score= self.score(book)
+        if score > 0:
+            entry= (-score, self.__order[book])
+            bisect.insort(self.__ranking, (*entry, book))
+            self.__entries[book]= entry
+
+    def __unplace(self, book: Book):
+        """
+        Internal method to take a book out of the ranking.
+        """
+        entry= self.__entries.pop(book, None)
+        if entry is not None:
+            del self.__ranking[bisect.bisect_left(self.__ranking, entry)]
+
+    def add(self, book: Book):
+        self.__order[book]= self.__next
+        self.__next+=1
+        self.__place(book)
+
+    def remove(self, book: Book):
+        self.__unplace(book)
+        del self.__order[book]
+
+    def update(self, book: Book):
+        self.__unplace(book)
+        self.__place(book)
+
+    def clear(self):
+        self.__ranking.clear()
+        self.__entries.clear()
+        self.__order.clear()
+        self.__next= 0
+
+    def top(self, k: int) -> list[Book]:
+        """
+        Returns the k most popular books, most popular first.
+        """
+        return [entry[2] for entry in self.__ranking[:k]]
+
+# the sorted orders of the books the views read, by index field
+ALPHABETICAL= 'alphabetical'
+GENRES= 'genres'
+
+def titleKey(book: Book) -> str:
+    """
+    Returns the value books are sorted by in alphabetical order.
+    """
+    return book.title
+
+def genreKey(book: Book) -> str:
+    """
+    Returns the value books are sorted by in genre order.
+    """
+    return str(book.genre)
+
+class SortedIndex(_CatalogIndex):
+    """
+    Keeps the books sorted by a key. Books are put in place with bisect
+    as they are added and removed, so the sorted order is read off
+    instead of sorting every book. Ties keep catalog order.
+    """
+    def __init__(self, field: str, key: Callable[[Book], str]):
+        super().__init__(field)
+        self.key= key
+        self.__keys: list[tuple]= []
+        self.__books: list[Book]= []
+        self.__entries: dict[Book, tuple]= {}
+        self.__next= 0
+
+    def add(self, book: Book):
+        entry= (self.key(book), self.__next)
+        self.__next+=1
+        i= bisect.bisect_left(self.__keys, entry)
+        self.__keys.insert(i, entry)
+        self.__books.insert(i, book)
+        self.__entries[book]= entry
+
+    def remove(self, book: Book):
+        i= bisect.bisect_left(self.__keys, self.__entries.pop(book))
+        del self.__keys[i]
+        del self.__books[i]
+
+    def clear(self):
+        self.__keys.clear()
+        self.__books.clear()
+        self.__entries.clear()
+        self.__next= 0
+
+    def books(self) -> list[Book]:
+        """
+        Returns the books in sorted order.
+        """
+        return list(self.__books)
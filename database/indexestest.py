@@ -0,0 +1,111 @@
+import unittest
+from database.catalog import Catalog
+from database.indexes import TextIndex, GenreIndex, YearIndex, PopularityIndex, SortedIndex
+from database.strategies import SearchByTitle, PopularDecorator, ViewBooklist, AlphabeticalDecorator, GenreDecorator
+from database.book import Book, Genre
+
+class TestTextIndex(unittest.TestCase):
+    def setUp(self):
+        self.books = [
+            Book("The Great Gatsby", "F. Scott Fitzgerald", False, 1, Genre.CLASSIC, 1925),
+            Book("Great Expectations", "Charles Dickens", False, 1, Genre.CLASSIC, 1861),
+            Book("War and Peace", "Leo Tolstoy", False, 1, Genre.HISTORICAL_FICTION, 1869)
+        ]
+        self.catalog = Catalog(self.books)
+        self.catalog.addIndex(TextIndex("title"))
+
+    def test_matches_scan(self):
+        for query in ["", "a", "Gr", "great", "at ex", "peace", "xyz", "ar and P"]:
+            scanned = [book for book in self.books if query.lower() in book.title.lower()]
+            self.assertEqual(self.catalog.search("title", query), scanned)
+
+    def test_kept_in_sync(self):
+        self.catalog.remove(self.books[0])
+        self.assertEqual(self.catalog.search("title", "great"), [self.books[1]])
+        new = Book("Greatness", "Someone", False, 1, Genre.FICTION, 2000)
+        self.catalog.add(new)
+        self.assertEqual(self.catalog.search("title", "great"), [self.books[1], new])
+
+    def test_strategy_uses_index(self):
+        results = SearchByTitle(self.catalog).search("war")
+        self.assertEqual(results, [self.books[2]])
+        with self.assertRaises(ValueError):
+            SearchByTitle(self.catalog).search("missing")
+
+class TestGenreYearIndex(unittest.TestCase):
+    def setUp(self):
+        self.books = [
+            Book("Test1", "Author1", False, 1, Genre.FICTION, 1925),
+            Book("Test2", "Author2", False, 1, Genre.SCIENCE_FICTION, 1969),
+            Book("Test3", "Author3", False, 1, Genre.ROMANCE, 1813),
+            Book("Test4", "Author4", False, 1, Genre.EPIC_POETRY, -750)
+        ]
+        self.catalog = Catalog(self.books)
+        self.catalog.addIndex(GenreIndex())
+        self.catalog.addIndex(YearIndex())
+
+    def test_genre_search(self):
+        self.assertEqual(self.catalog.search("genre", "fiction"), self.books[:2])
+        self.assertEqual(self.catalog.search("genre", "Romance"), [self.books[2]])
+
+    def test_year_search(self):
+        self.assertEqual(self.catalog.search("year", "19"), self.books[:2])
+        self.assertEqual(self.catalog.search("year", "1800-1950"), [self.books[0], self.books[2]])
+        self.assertEqual(self.catalog.search("year", "-800 - 0"), [self.books[3]])
+
+    def test_year_kept_in_sync(self):
+        self.catalog.remove(self.books[1])
+        self.assertEqual(self.catalog.search("year", "1900-2000"), [self.books[0]])
+
+class TestPopularityIndex(unittest.TestCase):
+    def setUp(self):
+        self.books = [
+            Book("Test1", "Author1", True, 2, Genre.FICTION, 2023),
+            Book("Test2", "Author2", True, 5, Genre.ROMANCE, 2023),
+            Book("Test3", "Author3", False, 1, Genre.FANTASY, 2023),
+            Book("Test4", "Author4", True, 2, Genre.SATIRE, 2023)
+        ]
+        self.catalog = Catalog(self.books)
+        self.catalog.addIndex(PopularityIndex("popularity", lambda book: book.loaned_copies))
+
+    def test_top(self):
+        ranking = self.catalog.getIndex("popularity")
+        self.assertEqual(ranking.top(10), [self.books[1], self.books[0], self.books[3]])
+        self.assertEqual(ranking.top(1), [self.books[1]])
+
+    def test_update(self):
+        self.books[2].loaned_copies = 1
+        self.books[1].loaned_copies = 0
+        self.catalog.update(self.books[2])
+        self.catalog.update(self.books[1])
+        ranking = self.catalog.getIndex("popularity")
+        self.assertEqual(ranking.top(10), [self.books[0], self.books[3], self.books[2]])
+
+    def test_decorator_uses_ranking(self):
+        view = PopularDecorator(ViewBooklist(self.catalog), k=2).view()
+        self.assertEqual(view, PopularDecorator(ViewBooklist(self.books), k=2).view())
+
+class TestSortedIndex(unittest.TestCase):
+    def setUp(self):
+        self.books = [
+            Book("Beta", "Author1", False, 1, Genre.ROMANCE, 2023),
+            Book("Alpha", "Author2", False, 1, Genre.FICTION, 2023),
+            Book("Gamma", "Author3", False, 1, Genre.FICTION, 2023)
+        ]
+        self.catalog = Catalog(self.books)
+        self.catalog.addIndex(SortedIndex(AlphabeticalDecorator.FIELD, AlphabeticalDecorator.key))
+        self.catalog.addIndex(SortedIndex(GenreDecorator.FIELD, GenreDecorator.key))
+
+    def test_matches_sort(self):
+        for decorator in [AlphabeticalDecorator, GenreDecorator]:
+            self.assertEqual(decorator(ViewBooklist(self.catalog)).view(),
+                             decorator(ViewBooklist(self.books)).view())
+
+    def test_kept_in_sync(self):
+        generation = self.catalog.generation
+        new = Book("Aardvark", "Author4", False, 1, Genre.SATIRE, 2023)
+        self.catalog.add(new)
+        self.catalog.remove(self.books[2])
+        self.assertGreater(self.catalog.generation, generation)
+        view = AlphabeticalDecorator(ViewBooklist(self.catalog)).view()
+        self.assertEqual([book.title for book in view], ["Aardvark", "Alpha", "Beta"])
@@ -0,0 +1,173 @@
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable
+
+class _OperationStats:
+    """
+    The counters of one instrumented operation. Only the latest SAMPLES
+    latencies are kept for the percentiles.
+    """
+    SAMPLES= 10_000
+    __slots__ = ('count', 'total', 'latencies', 'read', 'written')
+
+    def __init__(self):
+        self.count= 0
+        self.total= 0.0
+        self.latencies: deque[float]= deque(maxlen=_OperationStats.SAMPLES)
+        self.read= 0
+        self.written= 0
+
+    def toDict(self) -> dict[str, float]:
+        """
+        Returns the counters, with the latencies in milliseconds.
+        """
+        ordered= sorted(self.latencies)
+        def percentile(p: float) -> float:
+            if not ordered:
+                return 0.0
+            return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000, 3)
+        return {
+            'count': self.count,
+            'total_ms': round(self.total * 1000, 3),
+            'mean_ms': round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            'p50_ms': percentile(50),
+            'p95_ms': percentile(95),
+            'p99_ms': percentile(99),
+            'max_ms': round(ordered[-1] * 1000, 3) if ordered else 0.0,
+            'bytes_read': self.read,
+            'bytes_written': self.written,
+        }
+
+class Instrumentation:
+    """
+    Opt-in counters for the library's operations: calls, latency and the
+    bytes of csv files read and written while they ran. While disabled,
+    an instrumented call only checks the enabled flag.
+    """
+    def __init__(self):
+        self.enabled= False
+        self.__stats: dict[str, _OperationStats]= {}
+        self.__lock= threading.Lock()
+        self.__local= threading.local()
+        self.__dumpFile: str | None= None
+
+    def enable(self, dumpFile: str= None):
+        """
+        Starts counting. If a dump file is given, the stats are written
+        to it as JSON when the program exits.
+        """
+        self.enabled= True
+        if dumpFile and self.__dumpFile is None:
+            atexit.register(self.__dumpOnExit)
+        self.__dumpFile= dumpFile or self.__dumpFile
+
+    def disable(self):
+        """
+        Stops counting. The counters are kept.
+        """
+        self.enabled= False
+
+    def reset(self):
+        """
+        Clears the counters.
+        """
+        with self.__lock:
+            self.__stats.clear()
+
+    def call(self, name: str, method: Callable, *args: Any, **kwargs: Any) -> Any:
+        """
+        Calls the method as the named operation, counting its latency.
+        """
+        stack= self.__stack()
+        stack.append(name)
+        started= time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            latency= time.perf_counter() - started
+            stack.pop()
+            with self.__lock:
+                stats= self.__stats.setdefault(name, _OperationStats())
+                stats.count+=1
+                stats.total+=latency
+                stats.latencies.append(latency)
+
+    def __stack(self) -> list[str]:
+        """
+        Internal method to get the operations running on this thread.
+        """
+        stack= getattr(self.__local, 'stack', None)
+        if stack is None:
+            stack= self.__local.stack= []
+        return stack
+
+    def countRead(self, size: int):
+        """
+        Adds bytes read from a file to the running operation.
+        """
+        self.__count(size, 0)
+
+    def countWritten(self, size: int):
+        """
+        Adds bytes written to a file to the running operation.
+        """
+        self.__count(0, size)
+
+    def __count(self, read: int, written: int):
+        """
+        Internal method to add file bytes to the running operation.
+        """
+        if not self.enabled:
+            return
+        stack= self.__stack()
+        if not stack:
+            return
+        with self.__lock:
+            stats= self.__stats.setdefault(stack[-1], _OperationStats())
+            stats.read+=read
+            stats.written+=written
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        """
+        Returns the counters of every operation called so far.
+        """
+        with self.__lock:
+            return {name: stats.toDict() for name, stats in self.__stats.items()}
+
+    def dump(self, file: str):
+        """
+        Writes the snapshot to a JSON file.
+        """
+        with open(file, 'w') as dumpfile:
+            json.dump(self.snapshot(), dumpfile, indent=2)
+
+    def __dumpOnExit(self):
+        """
+        Internal method to dump the stats when the program exits.
+        """
+        if self.__dumpFile:
+            self.dump(self.__dumpFile)
+
+INSTRUMENTATION= Instrumentation()
+
+# set LIBRARY_STATS to a file path to collect stats and dump them there on exit
+if os.environ.get('LIBRARY_STATS'):
+    INSTRUMENTATION.enable(os.environ['LIBRARY_STATS'])
+
+def instrument(name: str):
+    """
+    Decorator to count a method's calls as the named operation.
+    """
+    def decorator(method: Callable) -> Callable:
+        @functools.wraps(method)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not INSTRUMENTATION.enabled:
+                return method(*args, **kwargs)
+            return INSTRUMENTATION.call(name, method, *args, **kwargs)
+        return wrapper
+    return decorator
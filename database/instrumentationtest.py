@@ -0,0 +1,37 @@
+import json
+import os
+import tempfile
+import unittest
+from database.instrumentation import INSTRUMENTATION, instrument
+
+@instrument('write')
+def write(size: int) -> int:
+    INSTRUMENTATION.countWritten(size)
+    return size
+
+class TestInstrumentation(unittest.TestCase):
+    def tearDown(self):
+        INSTRUMENTATION.disable()
+        INSTRUMENTATION.reset()
+
+    def test_disabled(self):
+        self.assertEqual(write(10), 10)
+        self.assertEqual(INSTRUMENTATION.snapshot(), {})
+
+    def test_counters(self):
+        INSTRUMENTATION.enable()
+        write(10)
+        write(5)
+        stats = INSTRUMENTATION.snapshot()["write"]
+        self.assertEqual(stats["count"], 2)
+        self.assertEqual(stats["bytes_written"], 15)
+        self.assertLessEqual(stats["p50_ms"], stats["max_ms"])
+
+    def test_dump(self):
+        INSTRUMENTATION.enable()
+        write(1)
+        with tempfile.TemporaryDirectory() as folder:
+            file = os.path.join(folder, "stats.json")
+            INSTRUMENTATION.dump(file)
+            with open(file) as f:
+                self.assertEqual(json.load(f)["write"]["count"], 1)
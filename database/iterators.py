@@ -1,5 +1,4 @@
 from Users.user import User
-from database import library
 from database.book import Book
 
 class __Iterator:
@@ -32,7 +31,9 @@ class UserIterator(__Iterator):
     Iterator for library users.
     """
     def __init__(self):
-        super().__init__(library.USERS)
+        # imported here, as the library imports the strategies, which import this module
+        from database import library
+        super().__init__(library.USERS.toList())
 
     def next(self) -> User:
         return super().next()
@@ -0,0 +1,73 @@
+import csv
+from typing import Iterator
+from database.book import Book, BookFactory
+from database.instrumentation import INSTRUMENTATION
+
+JOURNAL_ACTIONS= ('add', 'remove', 'borrow', 'return')
+
+class Journal:
+    """
+    An append-only log of the mutations made to the library's books.
+    Every action is written as one csv row holding the book's state
+    after it, so recording it costs the same no matter how big the
+    catalog is. The rows are replayed on top of the csv snapshot when
+    the library loads, and cleared once the snapshot is rewritten.
+    """
+    def __init__(self, file: str= 'journal.csv', compactEvery: int= 500):
+        self.file= file
+        self.compactEvery= compactEvery
+        self.__length= sum(1 for _ in self.records())
+
+    def __len__(self) -> int:
+        return self.__length
+
+    def append(self, action: str, book: Book):
+        """
+        Appends an action made on the book to the journal.
+        """
+        self.extend([(action, book)])
+
+    def extend(self, records: list[tuple[str, Book]]):
+        """
+        Appends many actions to the journal, opening it once.
+        """
+        for action, _ in records:
+            if action not in JOURNAL_ACTIONS:
+                raise ValueError(f"Unknown journal action '{action}'")
+        with open(self.file, 'a', newline='') as journal:
+            start= journal.tell()
+            writer= csv.writer(journal, delimiter=',')
+            writer.writerows([action, *book.toRow()] for action, book in records)
+            INSTRUMENTATION.countWritten(journal.tell() - start)
+        self.__length+=len(records)
+
+    def records(self) -> Iterator[tuple[str, Book]]:
+        """
+        Yields the journaled actions in the order they were made.
+        A row that was cut off while being written is skipped.
+        """
+        try:
+            with open(self.file, 'r', newline='') as journal:
+                for row in csv.reader(journal, delimiter=','):
+                    if len(row) not in (7, 8) or row[0] not in JOURNAL_ACTIONS:
+                        continue
+                    try:
+                        yield row[0], BookFactory.create_book_from_row(row[1:])
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            return
+
+    def needsCompaction(self) -> bool:
+        """
+        Returns True if the journal grew enough to be folded into the snapshots.
+        """
+        return self.__length >= self.compactEvery
+
+    def clear(self):
+        """
+        Empties the journal. Call after the snapshots were rewritten.
+        """
+        with open(self.file, 'w', newline=''):
+            pass
+        self.__length= 0
@@ -0,0 +1,41 @@
+import os
+import tempfile
+import unittest
+from database.journal import Journal
+from database.book import Book, Genre
+
+class TestJournal(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.dir.name, "journal.csv")
+        self.journal = Journal(self.file, compactEvery=2)
+        self.book = Book("Test Book", "Test Author", False, 1, Genre.FICTION, 2023)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_append_and_replay(self):
+        self.journal.append("add", self.book)
+        self.journal.append("borrow", self.book)
+        records = list(Journal(self.file).records())
+        self.assertEqual([action for action, _ in records], ["add", "borrow"])
+        self.assertEqual(records[0][1], self.book)
+
+    def test_compaction(self):
+        self.journal.append("add", self.book)
+        self.assertFalse(self.journal.needsCompaction())
+        self.journal.append("remove", self.book)
+        self.assertTrue(self.journal.needsCompaction())
+        self.journal.clear()
+        self.assertEqual(len(self.journal), 0)
+        self.assertEqual(list(self.journal.records()), [])
+
+    def test_cut_off_row_skipped(self):
+        self.journal.append("add", self.book)
+        with open(self.file, "a") as f:
+            f.write("borrow,Test Bo")
+        self.assertEqual(len(list(Journal(self.file).records())), 1)
+
+    def test_unknown_action(self):
+        with self.assertRaises(ValueError):
+            self.journal.append("lend", self.book)
@@ -1,52 +1,48 @@
-from copy import deepcopy
-import csv
-import random
-import string
-import hashlib
+import threading
+import time
 from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Iterable, Iterator
 from Users.user import User
-from database.book import Book, BookFactory
+from Users.hashing import _PasswordHasher, PBKDF2Hasher, newSalt
+from Users.directory import UserDirectory
+from Users.notifications import EventLog, Subscriptions
+from database.book import Book, BookChange, BookFactory, Genre
+from database.catalog import Catalog, CatalogView
+from database.indexes import TextIndex, GenreIndex, YearIndex, PopularityIndex, SortedIndex, ALPHABETICAL, GENRES, genreKey, titleKey
+from database.auditlog import AuditLog
+from database.instrumentation import instrument
+from database.locks import KeyedLocks, ReadWriteLock
+from database.storage import _Storage, CSVStorage
 import database.strategies as strats
-from database.iterators import UserIterator
 
-BOOKS: list[Book] = []
-AVAILABLE_BOOKS: list[Book] = []
-LOANED_BOOKS: list[Book] = []
-USERS: list[User] = []
-
-def _csvToBook(file: str) -> list[Book]:
-    """
-    Returns a list of Book objects from the csv.
-    """
-    output: list[Book]= []
-    with open(file, 'r', newline='') as bookfile:
-        booklist = csv.reader(bookfile, delimiter=',')
-        for i, row in enumerate(booklist):
-            if i != 0:
-                output.append(BookFactory.create_book_from_row(row))
-    return output
-
-def _csvAsMatrix(file: str) -> list[list[str]]:
-    """
-    Returns a matrix representing the rows of the csv file.
-    """
-    with open(file, 'r', newline='') as f:
-        return list(csv.reader(f, delimiter=','))
-
-def _ifFileExists(file: str) -> bool:
-    """
-    Returns True if file path exists, False otherwise.
-    """
-    try:
-        with open(file, 'r'):
-            pass
-    except OSError:
-        return False
-    return True
+BOOKS: Catalog = Catalog()
+AVAILABLE_BOOKS: CatalogView = BOOKS.view(lambda book: book.availableCopies() > 0)
+LOANED_BOOKS: CatalogView = BOOKS.view(lambda book: book.loaned_copies > 0)
+BOOKS.addIndex(TextIndex('title'))
+BOOKS.addIndex(TextIndex('author'))
+BOOKS.addIndex(GenreIndex('genre'))
+BOOKS.addIndex(YearIndex('year'))
+BOOKS.addIndex(PopularityIndex('popularity', lambda book: book.loaned_copies))
+BOOKS.addIndex(PopularityIndex('demand', lambda book: book.loaned_copies + book.waitingCount()))
+BOOKS.addIndex(SortedIndex(ALPHABETICAL, titleKey))
+BOOKS.addIndex(SortedIndex(GENRES, genreKey))
+USERS = UserDirectory()
+EVENTS = EventLog()
+SUBSCRIPTIONS = Subscriptions()
+AUDIT = AuditLog('log.txt')
+# views and searches read the catalog together, adding and removing books
+# is exclusive. Borrow and return read it, and are serialized per book
+CATALOG_LOCK = ReadWriteLock()
+BOOK_LOCKS = KeyedLocks()
+# serializes the short updates of shared indexes and the storage
+WRITE_LOCK = threading.RLock()
+USERS_LOCK = threading.Lock()
 
 class _Obserable(ABC):
     @abstractmethod
-    def notify(self, message: str):
+    def notify(self, message: str, topics: Iterable[str]= ('library',)):
         """
         Notify the inputted message to all observers.
         """
@@ -56,352 +52,569 @@ class Library(_Obserable):
     """
     Represents a library database. Contains functions to manage books and users.
     """
-    def __init__(self):
-        global BOOKS, AVAILABLE_BOOKS, LOANED_BOOKS, USERS
-        # get books from csv
-        BOOKS= _csvToBook('books.csv')
-        # copy into available books
-        if not _ifFileExists('available_books.csv'):
-            AVAILABLE_BOOKS.extend(book for book in BOOKS if not book.loaned)
-            with open('available_books.csv', 'x', newline='') as bookfile:
-                writer= csv.writer(bookfile, delimiter=',')
-                writer.writerow(["title","author","is_loaned","copies","genre","year"])
-                writer.writerows(book.toList() for book in AVAILABLE_BOOKS)
-        else:
-            AVAILABLE_BOOKS= _csvToBook('available_books.csv')
-        if not _ifFileExists('loaned_books.csv'):
-            LOANED_BOOKS.extend(book for book in BOOKS if book.loaned)
-            with open('loaned_books.csv', 'x', newline='') as bookfile:
-                writer= csv.writer(bookfile, delimiter=',')
-                writer.writerow(["title","author","is_loaned","copies","genre","year"])
-                writer.writerows(book.toList() for book in LOANED_BOOKS)
-        else:
-            LOANED_BOOKS= _csvToBook('loaned_books.csv')
-        # get user data
-        if not _ifFileExists('users.csv'):
-            with open('users.csv', 'x', newline='') as userfile:
-                userwriter= csv.writer(userfile, delimiter=',')
-                userwriter.writerow(["name","password","salt"])
-        else:
-            with open('users.csv', 'r') as userfile:
-                userreader= csv.reader(userfile, delimiter=',')
-                for i, row in enumerate(userreader):
-                    if i != 0:
-                        USERS.append(User.parseUser(row))
-        # create log.txt
-        if not _ifFileExists('log.txt'):
-            with open('log.txt', 'x') as log:
-                log.write('')
+    def __init__(self, storage: _Storage= None, popularCount: int= 10,
+                 hasher: _PasswordHasher= None, verifyWorkers: int= None, auditLog: AuditLog= None):
+        self.storage= storage if storage else CSVStorage()
+        self.audit= auditLog if auditLog else AUDIT
+        self.popularCount= popularCount
+        self.hasher= hasher if hasher else PBKDF2Hasher()
+        # the writes deferred by a running batch, by book key
+        self.__pending: dict[tuple, tuple[str, Book]] | None= None
+        self.__pendingWaiting: dict[tuple, Book]= {}
+        # password hashing releases the GIL, so logins verify in parallel
+        self.__verifiers= ThreadPoolExecutor(max_workers=verifyWorkers, thread_name_prefix='verify')
+        # get books and users from storage
+        with CATALOG_LOCK.writing():
+            BOOKS.clear()
+            BOOKS.addRows(self.storage.loadRows())
+            if self.storage.needsCompaction():
+                self.__compact()
+            self.__loadWaitingLists()
+        with USERS_LOCK:
+            USERS.clear()
+            SUBSCRIPTIONS.clear()
+            USERS.load(self.storage.loadUsers())
+            for user in USERS:
+                user.follow(EVENTS)
 
-    def __log__(self, action: str):
+    def __loadWaitingLists(self):
         """
-        Logs an action into the log file.
+        Internal method to put the stored waiting lists back on their books.
         """
-        with open('log.txt', 'a') as log:
-            log.write(f'{action}\n')
+        for (title, author, genre, year), names in self.storage.loadWaitingLists().items():
+            try:
+                book= BookFactory.create_book_from_input(title, author, genre, year)
+            except ValueError:
+                continue
+            if book in BOOKS:
+                book= BOOKS.get(book)
+                for name in names:
+                    book.addToWaitingList(name)
+                BOOKS.update(book)
 
-    def notify(self, message: str):
+    def __log__(self, action: str, user: str= None, book: Book= None, started: float= None):
         """
-        Notify the inputted message to all observers.
+        Logs an action into the audit log. started is the perf_counter
+        time the action started at, to log its latency.
+        """
+        latency= None if started is None else time.perf_counter() - started
+        self.audit.write(action, user, None if book is None else book.title, latency)
+
+    def notify(self, message: str, topics: Iterable[str]= ('library',)):
+        """
+        Notify the inputted message to all observers. The message is
+        published once to the event log, and users read it from there.
+        """
+        EVENTS.publish(message, topics)
+
+    @staticmethod
+    def topics(book: Book) -> tuple[str, ...]:
+        """
+        Returns the topics of events about the book.
+        """
+        return ('books', f'title:{book.title.lower()}', Library.authorTopic(book.author),
+                Library.genreTopic(book.genre))
+
+    @staticmethod
+    def authorTopic(author: str) -> str:
+        """
+        Returns the topic of events about the author's books.
         """
-        for user in USERS:
+        return f'author:{author.strip().lower()}'
+
+    @staticmethod
+    def genreTopic(genre: Genre) -> str:
+        """
+        Returns the topic of events about the genre's books.
+        """
+        return f'genre:{genre.name.lower()}'
+
+    def __deliver(self, message: str, book: Book):
+        """
+        Internal method to hand a message about the book only to the
+        users waiting for it and the followers of its author and genre.
+        """
+        recipients: dict[User, None]= {}
+        for name in book.getWaitingList():
+            if name in USERS:
+                recipients[USERS.get(name)]= None
+        for topic in (Library.authorTopic(book.author), Library.genreTopic(book.genre)):
+            recipients.update(dict.fromkeys(SUBSCRIPTIONS.followers(topic)))
+        for user in recipients:
             user.update(message)
 
-    def __addBookToCSV(self, book: Book, csvfile: str):
+    def followAuthor(self, username: str, author: str):
         """
-        Internal method to add a book to the given csvfile path.
+        Notifies the user when a book by the author becomes available.
         """
-        with open(csvfile, 'a', newline='') as books:
-            booklist = csv.writer(books, delimiter=',')
-            booklist.writerow(book.toList())
+        SUBSCRIPTIONS.follow(Library.authorTopic(author), USERS.get(username))
 
-    def addBook(self, book: Book):
+    def unfollowAuthor(self, username: str, author: str):
         """
-        Adds a book to the library.
+        Stops notifying the user about the author's books.
         """
-        try:
-            # if book already exists
+        SUBSCRIPTIONS.unfollow(Library.authorTopic(author), USERS.get(username))
+
+    def followGenre(self, username: str, genre: str):
+        """
+        Notifies the user when a book of the genre becomes available.
+        """
+        SUBSCRIPTIONS.follow(Library.genreTopic(Genre.parseGenre(genre)), USERS.get(username))
+
+    def unfollowGenre(self, username: str, genre: str):
+        """
+        Stops notifying the user about the genre's books.
+        """
+        SUBSCRIPTIONS.unfollow(Library.genreTopic(Genre.parseGenre(genre)), USERS.get(username))
+
+    def __apply(self, action: str, book: Book) -> BookChange:
+        """
+        Internal method to apply an action to the catalog in place.
+        Returns the change made, holding the book as stored in the catalog.
+        """
+        if action == 'add':
+            # if book already exists, add its copies
             if book in BOOKS:
-                # get book in database
-                i1= BOOKS.index(book)
-                i2= AVAILABLE_BOOKS.index(book)
-                book= BOOKS[i1]
-                backup= deepcopy(book)
-                # add 1 copy
-                book.copies+=1
-                # replace book
-                BOOKS.remove(backup)
-                AVAILABLE_BOOKS.remove(backup)
-                BOOKS.insert(i1, book)
-                AVAILABLE_BOOKS.insert(i2, book)
-                # update book
-                self.updateBookDetails(backup, book, 'books.csv')
-                self.updateBookDetails(backup, book, 'available_books.csv')
+                copies= book.copies
+                book= BOOKS.get(book)
+                old= BookChange.state(book)
+                book.copies+=copies
+                book.loaned= False
+                BOOKS.update(book)
             else:
-                BOOKS.append(book)
-                AVAILABLE_BOOKS.append(book)
-                # add new book to csv
-                self.__addBookToCSV(book, 'books.csv')
-                self.__addBookToCSV(book, 'available_books.csv')
-        except OSError as e:
-            self.__log__('book added fail')
-            raise OSError(e)
-        self.__log__('book added successfully')
-        self.notify(f'The book {book.title} has been added.')
-
-    def __removeBookFromCSV(self, book: Book, csvfile: str):
-        """
-        Internal method to remove a book from the given csvfile path.
-        """
-        # read csv
-        bookfile= _csvAsMatrix(csvfile)
-        # remove relevant row
-        rows= [row for row in bookfile if row[0] != book.title]
-        # write to csv
-        with open(csvfile, 'w', newline='') as books:
-            bookwriter= csv.writer(books)
-            bookwriter.writerows(rows)
+                old= None
+                BOOKS.add(book)
+        elif action == 'remove':
+            book= BOOKS.get(book)
+            old= BookChange.state(book)
+            BOOKS.remove(book)
+            return BookChange(action, book, old, None)
+        elif action == 'borrow':
+            book= AVAILABLE_BOOKS.get(book)
+            old= BookChange.state(book)
+            book.loaned_copies+=1
+            # if all is loaned
+            book.loaned= book.availableCopies() == 0
+            BOOKS.update(book)
+        elif action == 'return':
+            if book in BOOKS and book not in LOANED_BOOKS:
+                raise ValueError("Book isn't loaned.")
+            book= LOANED_BOOKS.get(book)
+            old= BookChange.state(book)
+            book.loaned_copies-=1
+            book.loaned= False
+            BOOKS.update(book)
+        return BookChange(action, book, old, BookChange.state(book))
+
+    def __record(self, action: str, book: Book) -> BookChange:
+        """
+        Internal method to apply an action and store it.
+        Returns the change made.
+        """
+        with WRITE_LOCK:
+            change= self.__apply(action, book)
+            self.__write([(action, change.book)])
+        return change
+
+    def __write(self, records: list[tuple[str, Book]]):
+        """
+        Internal method to store actions, or keep them for the running
+        batch's flush. Called with WRITE_LOCK held.
+        """
+        if self.__pending is not None:
+            for action, book in records:
+                self.__pending[book.key()]= (action, book)
+            return
+        self.storage.recordMany(records)
+        if self.storage.needsCompaction():
+            self.__compact()
+
+    def __writeWaitingList(self, book: Book):
+        """
+        Internal method to store a book's waiting list, or keep it for
+        the running batch's flush. Called with WRITE_LOCK held.
+        """
+        if self.__pending is not None:
+            self.__pendingWaiting[book.key()]= book
+        else:
+            self.storage.recordWaitingList(book)
 
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """
+        Defers the storage writes of the actions made inside it to a
+        single flush when it ends. A book changed several times is only
+        written in its final state. Actions made by other threads while
+        it runs are flushed with it, and a nested batch joins the outer one.
+        """
+        with WRITE_LOCK:
+            outer= self.__pending is None
+            if outer:
+                self.__pending= {}
+                self.__pendingWaiting= {}
+        try:
+            yield
+        finally:
+            if outer:
+                self.__flush()
+
+    def __flush(self):
+        """
+        Internal method to write the actions deferred by a batch.
+        """
+        with WRITE_LOCK:
+            records= list(self.__pending.values())
+            waiting= list(self.__pendingWaiting.values())
+            self.__pending= None
+            self.__pendingWaiting= {}
+            if records:
+                self.__write(records)
+            for book in waiting:
+                self.storage.recordWaitingList(book)
+
+    def compact(self):
+        """
+        Rewrites the storage from the catalog.
+        """
+        with CATALOG_LOCK.reading(), WRITE_LOCK:
+            self.__compact()
+
+    def __compact(self):
+        """
+        Internal method to rewrite the storage, with the locks already held.
+        """
+        self.storage.compact(BOOKS.rows())
+
+    @instrument('addBook')
+    def addBook(self, book: Book) -> Book:
+        """
+        Adds a book to the library. If it already exists, its copies are
+        added to it. Returns the book as stored in the library.
+        """
+        started= time.perf_counter()
+        with CATALOG_LOCK.writing():
+            try:
+                book= self.__record('add', book).book
+            except OSError as e:
+                self.__log__('book added fail', book=book, started=started)
+                raise OSError(e)
+            self.__log__('book added successfully', book=book, started=started)
+            self.notify(f'The book {book.title} has been added.', Library.topics(book))
+            return book
+
+    def addBooks(self, rows: Iterable[list[str]]) -> tuple[int, list[tuple[list[str], str]]]:
+        """
+        Adds many books to the library at once. Each row is checked like a
+        books.csv row, copies of books already in the library are added to
+        them, the storage is written once and a single notification is sent.
+        Returns the number of rows added, and the rejected rows with the reason.
+        """
+        started= time.perf_counter()
+        with CATALOG_LOCK.writing():
+            added= 0
+            rejected: list[tuple[list[str], str]]= []
+            changed: dict[Book, Book]= {}
+            for row in rows:
+                try:
+                    book= BookFactory.create_book_from_row(row)
+                    if book.copies < 1:
+                        raise ValueError("A book must have at least one copy.")
+                except (ValueError, IndexError) as e:
+                    rejected.append((row, str(e)))
+                    continue
+                # if book already exists, add its copies
+                if book in BOOKS:
+                    stored= BOOKS.get(book)
+                    stored.copies+=book.copies
+                    stored.loaned= False
+                    BOOKS.update(stored)
+                    book= stored
+                else:
+                    BOOKS.add(book)
+                changed[book]= book
+                added+=1
+            try:
+                with WRITE_LOCK:
+                    self.__write([('add', book) for book in changed])
+            except OSError as e:
+                self.__log__('books added fail', started=started)
+                raise OSError(e)
+            self.__log__(f'{added} books added successfully', started=started)
+            if added:
+                self.notify(f'{added} books have been added.', ('books',))
+            return added, rejected
+
+    @instrument('removeBook')
     def removeBook(self, book: Book):
         """
         Removes a book from the library.
         """
-        BOOKS.remove(book)
-        if book in AVAILABLE_BOOKS:
-            AVAILABLE_BOOKS.remove(book)
-        if book in LOANED_BOOKS:
-            LOANED_BOOKS.remove(book)
-        try:
-            self.__removeBookFromCSV(book, 'books.csv')
-            self.__removeBookFromCSV(book, 'available_books.csv')
-            self.__removeBookFromCSV(book, 'loaned_books.csv')
-            self.__log__('book removed successfully')
-            self.notify(f'The book {book.title} has been removed.')
-        except:
-            self.__log__('book removed fail')
-
-    def updateBookDetails(self, oldBook: Book, newBook: Book, csvfile: str):
-        """
-        Updates the details of the book in the specified index in the
-        specified CSV file.
-        """
-        BOOKS[BOOKS.index(oldBook)]= newBook
-        if oldBook in AVAILABLE_BOOKS:
-            AVAILABLE_BOOKS[AVAILABLE_BOOKS.index(oldBook)]= newBook
-        if oldBook in LOANED_BOOKS:
-            LOANED_BOOKS[LOANED_BOOKS.index(oldBook)]= newBook
-        # read csv
-        bookfile= _csvAsMatrix(csvfile)
-        # update relevant row 
-        rows= [newBook.toList() if oldBook.title == row[0] else row for row in bookfile]
-        # write to csv
-        with open(csvfile, 'w', newline='') as books:
-            bookwriter= csv.writer(books)
-            bookwriter.writerows(rows)
+        started= time.perf_counter()
+        with CATALOG_LOCK.writing():
+            if book not in BOOKS:
+                raise ValueError("Book doesn't exist.")
+            try:
+                book= self.__record('remove', book).book
+                # the waiting list goes with the book
+                if book.waitingCount():
+                    while book.waitingCount():
+                        book.popWaitingList()
+                    with WRITE_LOCK:
+                        self.__writeWaitingList(book)
+                self.__log__('book removed successfully', book=book, started=started)
+                self.notify(f'The book {book.title} has been removed.', Library.topics(book))
+            except OSError:
+                self.__log__('book removed fail', book=book, started=started)
+
+    def updateBookDetails(self, oldBook: Book, newBook: Book, csvfile: str= None):
+        """
+        Replaces the details of a book with new ones. The csvfile is only
+        kept for compatibility, the change is stored in the library's storage.
+        """
+        with CATALOG_LOCK.writing(), WRITE_LOCK:
+            BOOKS.replace(oldBook, newBook)
+            records= [('add', newBook)]
+            if oldBook.key() != newBook.key():
+                records.insert(0, ('remove', oldBook))
+            self.__write(records)
 
+    @instrument('registerUser')
     def registerUser(self, name: str, password: str) -> bool:
         """
         Register a user to the library. Returns True if registered, False otherwise.
         """
-        # generate random salt
-        salt= ''.join(random.choices(string.ascii_letters + string.digits, k=5))
-        pword= hashlib.sha256((password+salt).encode()).hexdigest()
-        # create user
-        newuser= User(name, pword, salt)
-        USERS.append(newuser)
-        try:
-            with open('users.csv', 'a', newline='') as userfile:
-                userwriter= csv.writer(userfile, delimiter=',')
-                userwriter.writerow([name, pword, salt])
-            self.__log__("registered successfully")
-            self.notify(message=f"{newuser.name}'s account has been created successfully.")
+        started= time.perf_counter()
+        with USERS_LOCK:
+            if name in USERS:
+                self.__log__("registered fail", name, started=started)
+                return False
+            salt= newSalt()
+            newuser= User(name, self.hasher.hash(password, salt), salt)
+            try:
+                with WRITE_LOCK:
+                    self.storage.addUser(newuser)
+            except OSError:
+                self.__log__("registered fail", name, started=started)
+                return False
+            USERS.add(newuser)
+            self.__log__("registered successfully", name, started=started)
+            newuser.follow(EVENTS)
+            self.notify(f"{newuser.name}'s account has been created successfully.", ('users',))
             return True
-        except OSError:
-            self.__log__("registered fail")
-            return False
 
+    @instrument('logInUser')
     def logInUser(self, username: str, password: str) -> bool:
         """
         Returns True if the password matches the username.
         """
-        current= None
-        userIter= UserIterator()
-        while userIter.hasNext():
-            user= userIter.next()
-            if user.name == username:
-                current= user
+        started= time.perf_counter()
+        current= USERS.get(username) if username in USERS else None
         if current and current.passwordMatch(password):
-            self.__log__('logged in successfully')
-            self.notify(message=f"{current.name} has logged in.")
+            if current.needsRehash(self.hasher):
+                self.__rehash(current, password)
+            self.__log__('logged in successfully', username, started=started)
+            self.notify(f"{current.name} has logged in.", ('users',))
             return True
         else:
-            self.__log__('logged in fail')
+            self.__log__('logged in fail', username, started=started)
             return False
         
+    def logInUserAsync(self, username: str, password: str) -> Future:
+        """
+        Checks the login on the verification pool, so the caller isn't
+        blocked while the password is hashed. The future holds what
+        logInUser returns.
+        """
+        return self.__verifiers.submit(self.logInUser, username, password)
+
+    def __rehash(self, user: User, password: str):
+        """
+        Internal method to store a password hashed by an older scheme or
+        cost with the library's hasher.
+        """
+        with USERS_LOCK:
+            if not user.needsRehash(self.hasher):
+                return
+            salt= newSalt()
+            upgraded= User(user.name, self.hasher.hash(password, salt), salt)
+            try:
+                with WRITE_LOCK:
+                    self.storage.updateUser(upgraded)
+            except (OSError, ValueError):
+                self.__log__('password upgrade fail', user.name)
+                return
+            # only once stored, so memory and storage agree if it fails
+            user.setHashedPassword(upgraded.toList()[1], salt)
+
+    def close(self):
+        """
+        Stops the login verification pool.
+        """
+        self.__verifiers.shutdown(wait=True)
+
     def logOutUser(self):
         """
         Method that records that the user was logged out.
         """
         self.__log__('logged out successfully')
         
-    def borrowBook(self, loaner: str, book_to_borrow: Book):
-        """
-        Borrows a book from the library in the name of the
-        mentioned user.
-        """
-        try:
-            # if book isn't available
-            if book_to_borrow not in AVAILABLE_BOOKS:
-                # add to waiting list
-                if book_to_borrow in LOANED_BOOKS:
-                    book_to_borrow.addToWaitingList(loaner)
-                    self.notify(f"{loaner} has been added to the waiting list for '{book_to_borrow.title}'.")
-                    raise OSError("waitlist")
-                raise ValueError("Book doesn't exist.")
-            else:
-                book_to_borrow= deepcopy([book for book in AVAILABLE_BOOKS if book == book_to_borrow][0])
-            oldbook= deepcopy(book_to_borrow)
-            # update book
-            book_to_borrow.copies-=1
-            # update available books
-            index= AVAILABLE_BOOKS.index(book_to_borrow)
-            AVAILABLE_BOOKS.remove(book_to_borrow)
-            # if copies are available
-            if book_to_borrow.copies > 0:
-                AVAILABLE_BOOKS.insert(index, book_to_borrow)
-                self.updateBookDetails(oldbook, book_to_borrow, 'available_books.csv')
-            else:
-                self.__removeBookFromCSV(book_to_borrow, 'available_books.csv')
-                # if all is loaned
-                index= BOOKS.index(book_to_borrow)
-                oldbook= deepcopy(BOOKS[index])
-                BOOKS[index].loaned= True
-                self.updateBookDetails(oldbook, BOOKS[index], 'books.csv')
-            # find book in loaned
-            if book_to_borrow in LOANED_BOOKS:
-                loaned_book= deepcopy([book for book in LOANED_BOOKS if book == book_to_borrow][0])
-                # if all is loaned
-                if book_to_borrow.copies == 0:
-                    loaned_book.loaned= True
-                # update loaned books
-                oldbook= deepcopy(loaned_book)
-                loaned_book.copies+=1
-                index= LOANED_BOOKS.index(loaned_book)
-                LOANED_BOOKS.remove(loaned_book)
-                LOANED_BOOKS.insert(index, loaned_book)
-                self.updateBookDetails(oldbook, loaned_book, 'loaned_books.csv')
-            else:
-                # add book to loaned
-                loaned_book= deepcopy(book_to_borrow)
-                loaned_book.copies= 1
-                if book_to_borrow.copies == 0:
-                    loaned_book.loaned= True
-                LOANED_BOOKS.append(loaned_book)
-                self.__addBookToCSV(loaned_book, 'loaned_books.csv')
-            # if in waiting list
-            if loaner.lower() in [name.lower() for name in book_to_borrow.getWaitingList()]:
-                book_to_borrow.removeFromWaitingList(loaner)
-            self.notify(message=f"The book '{book_to_borrow.title}' was borrowed by {loaner}.")
-            self.__log__('book borrowed successfully')
-        except Exception as e:
-            self.__log__('book borrowed fail')
-            raise Exception(e)
-
-    def returnBook(self, loaner: str, book_to_return: Book):
+    @instrument('borrowBook')
+    def borrowBook(self, loaner: str, book_to_borrow: Book) -> BookChange:
         """
         Borrows a book from the library in the name of the
-        mentioned user.
-        """
-        try:
-            book_to_return= deepcopy([book for book in LOANED_BOOKS if book == book_to_return][0])
-            # find book in available
-            oldbook= deepcopy(book_to_return)
-            # update book
-            book_to_return.copies-=1
-            book_to_return.loaned= False
-            # update loaned books
-            index= LOANED_BOOKS.index(book_to_return)
-            LOANED_BOOKS.remove(book_to_return)
-            if book_to_return.copies > 0:
-                LOANED_BOOKS.insert(index, book_to_return)
-                self.updateBookDetails(oldbook, book_to_return, 'loaned_books.csv')
-            else:
-                self.__removeBookFromCSV(book_to_return, 'loaned_books.csv')
-                # if all is available
-                index= BOOKS.index(book_to_return)
-                oldbook= deepcopy(BOOKS[index])
-                BOOKS[index].loaned= False
-                self.updateBookDetails(oldbook, BOOKS[index], 'books.csv')
-            # find book in loaned
-            if book_to_return in AVAILABLE_BOOKS:
-                # update available books
-                returned_book= deepcopy([book for book in AVAILABLE_BOOKS if book == book_to_return][0])
-                oldbook= deepcopy(returned_book)
-                returned_book.copies+=1
-                self.updateBookDetails(oldbook, returned_book, 'available_books.csv')
-            else:
-                returned_book= deepcopy(book_to_return)
-                returned_book.copies= 1
-                AVAILABLE_BOOKS.append(returned_book)
-                # notify to waiting list
-                self.notify(message= f"The book {returned_book.title} has returned.")
-                self.__addBookToCSV(returned_book, 'available_books.csv')
-            self.__log__('book returned successfully')
-            self.notify(message=f"The book '{book_to_return.title}' was returned by {loaner}.")
-        except Exception as e:
-            self.__log__('book borrowed fail')
-            raise Exception(e)
+        mentioned user. Returns the change made to the book.
+        """
+        started= time.perf_counter()
+        with CATALOG_LOCK.reading(), BOOK_LOCKS.hold(book_to_borrow.key()):
+            try:
+                # if book isn't available
+                if book_to_borrow not in AVAILABLE_BOOKS:
+                    # add to waiting list
+                    if book_to_borrow in LOANED_BOOKS:
+                        book_to_borrow= LOANED_BOOKS.get(book_to_borrow)
+                        if book_to_borrow.addToWaitingList(loaner):
+                            with WRITE_LOCK:
+                                BOOKS.update(book_to_borrow)
+                                self.__writeWaitingList(book_to_borrow)
+                        self.notify(f"{loaner} has been added to the waiting list for '{book_to_borrow.title}'.",
+                                    Library.topics(book_to_borrow))
+                        raise OSError("waitlist")
+                    raise ValueError("Book doesn't exist.")
+                change= self.__record('borrow', book_to_borrow)
+                book_to_borrow= change.book
+                # if in waiting list
+                if book_to_borrow.isWaiting(loaner):
+                    book_to_borrow.removeFromWaitingList(loaner)
+                    with WRITE_LOCK:
+                        BOOKS.update(book_to_borrow)
+                        self.__writeWaitingList(book_to_borrow)
+                self.notify(f"The book '{book_to_borrow.title}' was borrowed by {loaner}.", Library.topics(book_to_borrow))
+                self.__log__('book borrowed successfully', loaner, book_to_borrow, started)
+                return change
+            except Exception as e:
+                self.__log__('book borrowed fail', loaner, book_to_borrow, started)
+                raise Exception(e)
+
+    @instrument('returnBook')
+    def returnBook(self, loaner: str, book_to_return: Book) -> BookChange:
+        """
+        Returns a book to the library in the name of the
+        mentioned user. Returns the change made to the book.
+        """
+        started= time.perf_counter()
+        with CATALOG_LOCK.reading(), BOOK_LOCKS.hold(book_to_return.key()):
+            try:
+                change= self.__record('return', book_to_return)
+                book_to_return= change.book
+                self.__log__('book returned successfully', loaner, book_to_return, started)
+                self.notify(f"The book '{book_to_return.title}' was returned by {loaner}.", Library.topics(book_to_return))
+                # hand the copy to the next user in line
+                if book_to_return.waitingCount():
+                    self.__handOff(book_to_return)
+                # notify the followers
+                elif book_to_return.availableCopies() == 1:
+                    self.__deliver(f"The book {book_to_return.title} has returned.", book_to_return)
+                return change
+            except Exception as e:
+                self.__log__('book returned fail', loaner, book_to_return, started)
+                raise Exception(e)
+
+    def __handOff(self, book: Book):
+        """
+        Internal method to borrow a returned copy in the name of the
+        user first in line for it.
+        """
+        loaner= book.popWaitingList()
+        self.__record('borrow', book)
+        with WRITE_LOCK:
+            self.__writeWaitingList(book)
+        if loaner in USERS:
+            USERS.get(loaner).update(f"The book '{book.title}' you waited for was borrowed for you.")
+        self.notify(f"The book '{book.title}' was borrowed by {loaner}.", Library.topics(book))
+        self.__log__('book handed off successfully', loaner, book)
 
+    @instrument('viewBooklist')
     def viewBooklist(self, category: str, books: list[Book]= None, log: bool= True):
         """
         Returns a list of Book objects in the library with various effects.
         """
-        if not books:
-            books= BOOKS
+        started= time.perf_counter()
+        with CATALOG_LOCK.reading():
+            if not books:
+                books= BOOKS.toList()
         
-        if category == "all":
-            bookview= strats.ViewBooklist(books)
-        elif category == "available":
-            bookview= strats.ViewBooklist([book for book in books if book in AVAILABLE_BOOKS])
-        elif category == "loaned":
-            bookview= strats.ViewBooklist([book for book in books if book in LOANED_BOOKS])
-        elif category == "popular":
-            bookview= strats.PopularDecorator(strats.ViewBooklist(LOANED_BOOKS))
-        if log:
-            self.__log__(f'Displayed {category} books successfully')
-        return bookview.view()
+            if category == "all":
+                bookview= strats.ViewBooklist(books)
+            elif category == "available":
+                bookview= strats.ViewBooklist([book for book in books if book in AVAILABLE_BOOKS])
+            elif category == "loaned":
+                bookview= strats.ViewBooklist([book for book in books if book in LOANED_BOOKS])
+            elif category == "popular":
+                bookview= strats.PopularDecorator(strats.ViewBooklist(BOOKS), self.popularCount)
+            books= bookview.view()
+            if log:
+                self.__log__(f'Displayed {category} books successfully', started=started)
+            return books
     
-    def sortByTitle(self, books: list[Book]):
+    def generation(self) -> int:
+        """
+        Returns a number that changes whenever the books change. Views read
+        while it stays the same are still up to date.
+        """
+        return BOOKS.generation
+
+    def __sortBooks(self, books: list[Book], decorator: type) -> list[Book]:
+        """
+        Internal method to sort books with the decorator. When the books
+        are a large part of the catalog, the catalog's sorted order is
+        filtered instead of sorting them.
+        """
+        if books is not None and len(books) * 2 < len(BOOKS):
+            return decorator(strats.ViewBooklist(books)).view()
+        ordered= decorator(strats.ViewBooklist(BOOKS)).view()
+        if books is None:
+            return ordered
+        wanted= set(books)
+        ordered= [book for book in ordered if book in wanted]
+        # books not in the catalog, or listed twice
+        if len(ordered) != len(books):
+            return decorator(strats.ViewBooklist(books)).view()
+        return ordered
+
+    def sortByTitle(self, books: list[Book]= None):
         """
         View books by title.
         """
-        bookview= strats.AlphabeticalDecorator(strats.ViewBooklist(books))
-        return bookview.view()
+        with CATALOG_LOCK.reading():
+            return self.__sortBooks(books, strats.AlphabeticalDecorator)
     
-    def sortByGenre(self, books: list[Book]):
+    def sortByGenre(self, books: list[Book]= None):
         """
         View books by genre.
         """
-        self.__log__('Displayed book by category successfully')
-        bookview= strats.GenreDecorator(strats.ViewBooklist(books))
-        return bookview.view()
+        with CATALOG_LOCK.reading():
+            self.__log__('Displayed book by category successfully')
+            return self.__sortBooks(books, strats.GenreDecorator)
     
+    @instrument('searchBooklist')
     def searchBooklist(self, query: str, searchby: str):
         """
         Searches the booklist based on the query and the value key.
         """
-        if searchby == "Title":
-            comp= strats.SearchByTitle(BOOKS)
-        elif searchby == "Author":
-            comp= strats.SearchByAuthor(BOOKS)
-        elif searchby == "Genre":
-            comp= strats.SearchByGenre(BOOKS)
-        elif searchby == "Year":
-            comp= strats.SearchByYear(BOOKS)
-        try:
-            responses= comp.search(query)
-            self.__log__(f'Search book "{query}" by {searchby.lower()} completed successfully')
-            return responses
-        except:
-            self.__log__(f'Search book "{query}" by {searchby.lower()} fail')
-            raise ValueError
\ No newline at end of file
+        started= time.perf_counter()
+        with CATALOG_LOCK.reading():
+            if searchby == "Title":
+                comp= strats.SearchByTitle(BOOKS)
+            elif searchby == "Author":
+                comp= strats.SearchByAuthor(BOOKS)
+            elif searchby == "Genre":
+                comp= strats.SearchByGenre(BOOKS)
+            elif searchby == "Year":
+                comp= strats.SearchByYear(BOOKS)
+            try:
+                responses= comp.search(query)
+                self.__log__(f'Search book "{query}" by {searchby.lower()} completed successfully', started=started)
+                return responses
+            except:
+                self.__log__(f'Search book "{query}" by {searchby.lower()} fail', started=started)
+                raise ValueError
\ No newline at end of file
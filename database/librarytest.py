@@ -1,10 +1,17 @@
+import hashlib
+import os
+import tempfile
+import threading
 import unittest
-from database.library import Library
+from database.library import Library, USERS
+from database.storage import CSVStorage
+from Users.hashing import PBKDF2Hasher
 from database.book import BookFactory
 
 class TestLibrary(unittest.TestCase):
     def setUp(self):
         self.library = Library()
+        self.addCleanup(self.library.close)
         self.test_book = BookFactory.create_book_from_input(
             "Test Book", "Test Author", "Fiction", "2023"
         )
@@ -28,5 +35,137 @@ class TestLibrary(unittest.TestCase):
     def test_return_book(self):
         self.library.addBook(self.test_book)
         self.library.borrowBook("test_user", self.test_book)
-        self.library.returnBook("test_user", self.test_book)
-        self.assertIn(self.test_book, self.library.viewBooklist("available"))
\ No newline at end of file
+        change = self.library.returnBook("test_user", self.test_book)
+        self.assertIn(self.test_book, self.library.viewBooklist("available"))
+        self.assertEqual(change.new[1], change.old[1] - 1)
+
+    def test_return_not_loaned(self):
+        self.library.addBook(self.test_book)
+        self.addCleanup(self.library.removeBook, self.test_book)
+        with self.assertRaisesRegex(Exception, "Book isn't loaned."):
+            self.library.returnBook("test_user", self.test_book)
+
+    def test_add_books(self):
+        initial_count = len(self.library.viewBooklist("all"))
+        added, rejected = self.library.addBooks([
+            ["Bulk Test Book", "Test Author", "No", "2", "Fiction", "2023"],
+            ["Bulk Test Book", "Test Author", "No", "1", "Fiction", "2023"],
+            ["Bad Book", "Test Author", "No", "1", "Invalid Genre", "2023"]
+        ])
+        self.assertEqual(added, 2)
+        self.assertEqual(len(rejected), 1)
+        self.assertEqual(len(self.library.viewBooklist("all")), initial_count + 1)
+        self.library.removeBook(BookFactory.create_book_from_input(
+            "Bulk Test Book", "Test Author", "Fiction", "2023"
+        ))
+
+class TestLibraryFiles(unittest.TestCase):
+    """
+    Tests on a library kept in its own temporary csv files.
+    """
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.bookfile = os.path.join(folder.name, "books.csv")
+        self.userfile = os.path.join(folder.name, "users.csv")
+        self.writeBooks()
+        self.test_book = BookFactory.create_book_from_input(
+            "Test Book", "Test Author", "Fiction", "2023"
+        )
+
+    def writeBooks(self, *rows):
+        with open(self.bookfile, "w") as f:
+            f.write("title,author,is_loaned,copies,genre,year\n")
+            for row in rows:
+                f.write(row + "\n")
+
+    def writeUsers(self, *rows):
+        with open(self.userfile, "w") as f:
+            f.write("name,password,salt\n")
+            for row in rows:
+                f.write(row + "\n")
+
+    def openLibrary(self, **kwargs):
+        library = Library(CSVStorage(self.bookfile, self.userfile), **kwargs)
+        self.addCleanup(library.close)
+        return library
+
+    def test_register_duplicate(self):
+        library = self.openLibrary(hasher=PBKDF2Hasher(1000))
+        library.registerUser("DupTestUser", "password")
+        self.assertFalse(library.registerUser("duptestuser", "other"))
+        self.assertTrue(library.logInUser("DupTestUser", "password"))
+
+    def test_legacy_password_upgrade(self):
+        legacy = hashlib.sha256(("password" + "salt1").encode()).hexdigest()
+        self.writeUsers(f"OldUser,{legacy},salt1")
+        library = self.openLibrary(hasher=PBKDF2Hasher(1000))
+        self.assertTrue(library.logInUserAsync("OldUser", "password").result())
+        library.close()
+        reloaded = self.openLibrary(hasher=PBKDF2Hasher(1000))
+        self.assertTrue(reloaded.logInUser("OldUser", "password"))
+        with open(self.userfile) as f:
+            self.assertIn("pbkdf2_sha256$1000$", f.read())
+
+    def test_failed_upgrade_keeps_password(self):
+        legacy = hashlib.sha256(("password" + "salt1").encode()).hexdigest()
+        self.writeUsers(f"OldUser,{legacy},salt1")
+        library = self.openLibrary(hasher=PBKDF2Hasher(1000))
+        os.remove(self.userfile)
+        self.assertTrue(library.logInUser("OldUser", "password"))
+        self.assertEqual(USERS.get("OldUser").toList(), ["OldUser", legacy, "salt1"])
+
+    def test_targeted_return_notification(self):
+        self.writeBooks("Test Book,Test Author,No,1,Fiction,2023")
+        self.writeUsers(*(f"{name},hash,salt" for name in ("Loaner", "Waiter", "Follower", "Other")))
+        library = self.openLibrary()
+        library.followAuthor("Follower", "test author")
+        library.borrowBook("Loaner", self.test_book)
+        with self.assertRaises(Exception):
+            library.borrowBook("Waiter", self.test_book)
+        users = {name: USERS.get(name) for name in ("Waiter", "Follower", "Other")}
+        # only read the targeted messages, not the shared feed
+        for user in users.values():
+            user.subscribe("none")
+        library.returnBook("Loaner", self.test_book)
+        self.assertEqual(users["Waiter"].getNotifications(),
+                         ["The book 'Test Book' you waited for was borrowed for you."])
+        self.assertEqual(users["Follower"].getNotifications(), [])
+        library.returnBook("Waiter", self.test_book)
+        self.assertEqual(users["Follower"].getNotifications(), ["The book Test Book has returned."])
+        self.assertEqual(users["Other"].getNotifications(), [])
+
+    def test_waiting_list_persisted(self):
+        self.writeBooks("Test Book,Test Author,Yes,1,Fiction,2023")
+        library = self.openLibrary()
+        for loaner in ("first", "second"):
+            with self.assertRaises(Exception):
+                library.borrowBook(loaner, self.test_book)
+        library = self.openLibrary()
+        library.returnBook("someone", self.test_book)
+        reloaded = self.openLibrary()
+        book = [book for book in reloaded.viewBooklist("loaned") if book == self.test_book][0]
+        self.assertEqual(book.getWaitingList(), ["second"])
+
+    def test_concurrent_borrow_return(self):
+        self.writeBooks(*(f"Book {i},Test Author,No,3,Fiction,2023" for i in range(4)))
+        library = self.openLibrary()
+        books = library.viewBooklist("all", log=False)
+        errors = []
+        def loan(loaner):
+            try:
+                for _ in range(20):
+                    for book in books:
+                        library.borrowBook(loaner, book)
+                        library.returnBook(loaner, book)
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=loan, args=(f"user{i}",)) for i in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        reloaded = self.openLibrary()
+        self.assertEqual(len(reloaded.viewBooklist("available", log=False)), 4)
+        self.assertTrue(all(book.loaned_copies == 0 for book in reloaded.viewBooklist("all", log=False)))
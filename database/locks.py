@@ -0,0 +1,82 @@
+import threading
+from contextlib import contextmanager
+from typing import Hashable, Iterator
+
+class ReadWriteLock:
+    """
+    A lock many readers can hold at once, or a single writer. Waiting
+    writers go before new readers, so a steady stream of views and
+    searches can't starve changes to the catalog. Not reentrant.
+    """
+    def __init__(self):
+        self.__condition= threading.Condition(threading.Lock())
+        self.__readers= 0
+        self.__writer= False
+        self.__waitingWriters= 0
+
+    @contextmanager
+    def reading(self) -> Iterator[None]:
+        """
+        Holds the lock as one of its readers.
+        """
+        with self.__condition:
+            while self.__writer or self.__waitingWriters:
+                self.__condition.wait()
+            self.__readers+=1
+        try:
+            yield
+        finally:
+            with self.__condition:
+                self.__readers-=1
+                if not self.__readers:
+                    self.__condition.notify_all()
+
+    @contextmanager
+    def writing(self) -> Iterator[None]:
+        """
+        Holds the lock as its only writer.
+        """
+        with self.__condition:
+            self.__waitingWriters+=1
+            while self.__writer or self.__readers:
+                self.__condition.wait()
+            self.__waitingWriters-=1
+            self.__writer= True
+        try:
+            yield
+        finally:
+            with self.__condition:
+                self.__writer= False
+                self.__condition.notify_all()
+
+class KeyedLocks:
+    """
+    A lock per key, like a book's title. Locks are created when a key is
+    first held and dropped once nobody holds or waits for them, so only
+    the keys in use take memory.
+    """
+    def __init__(self):
+        self.__lock= threading.Lock()
+        # the lock of each key, and how many threads hold or wait for it
+        self.__locks: dict[Hashable, list]= {}
+
+    def __len__(self) -> int:
+        return len(self.__locks)
+
+    @contextmanager
+    def hold(self, key: Hashable) -> Iterator[None]:
+        """
+        Holds the key's lock.
+        """
+        with self.__lock:
+            entry= self.__locks.setdefault(key, [threading.Lock(), 0])
+            entry[1]+=1
+        entry[0].acquire()
+        try:
+            yield
+        finally:
+            entry[0].release()
+            with self.__lock:
+                entry[1]-=1
+                if not entry[1]:
+                    del self.__locks[key]
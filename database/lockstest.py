@@ -0,0 +1,65 @@
+import threading
+import time
+import unittest
+from database.locks import KeyedLocks, ReadWriteLock
+
+class TestReadWriteLock(unittest.TestCase):
+    def test_readers_share(self):
+        lock = ReadWriteLock()
+        inside = threading.Barrier(2, timeout=5)
+        def read():
+            with lock.reading():
+                inside.wait()
+        threads = [threading.Thread(target=read) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        self.assertFalse(inside.broken)
+
+    def test_writer_excludes_readers(self):
+        lock = ReadWriteLock()
+        events = []
+        def read():
+            with lock.reading():
+                events.append("read")
+        with lock.writing():
+            reader = threading.Thread(target=read)
+            reader.start()
+            time.sleep(0.05)
+            events.append("written")
+        reader.join(5)
+        self.assertEqual(events, ["written", "read"])
+
+class TestKeyedLocks(unittest.TestCase):
+    def test_same_key_serialized(self):
+        locks = KeyedLocks()
+        counts = {"active": 0, "most": 0}
+        def hold():
+            for _ in range(50):
+                with locks.hold("key"):
+                    counts["active"] += 1
+                    counts["most"] = max(counts["most"], counts["active"])
+                    time.sleep(0)
+                    counts["active"] -= 1
+        threads = [threading.Thread(target=hold) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(counts["most"], 1)
+        self.assertEqual(len(locks), 0)
+
+    def test_other_keys_not_blocked(self):
+        locks = KeyedLocks()
+        with locks.hold("first"):
+            done = threading.Event()
+            def hold():
+                with locks.hold("second"):
+                    done.set()
+            threading.Thread(target=hold).start()
+            self.assertTrue(done.wait(5))
+            self.assertEqual(len(locks), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,205 @@
+import heapq
+import os
+import threading
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable
+from database.book import Book, Genre
+from database.catalog import Catalog
+from database.indexes import _CatalogIndex
+
+# the searchable fields, by their column in a shard row
+FIELDS= {'title': 0, 'author': 1, 'genre': 2, 'year': 3}
+PARTITIONS= ('title', 'genre')
+
+# the shard held by this worker process, by catalog position
+_SHARD: dict[int, tuple[str, str, str, str]]= {}
+
+def _loadShard(rows: dict[int, tuple[str, str, str, str]]):
+    """
+    Replaces the worker's shard.
+    """
+    _SHARD.clear()
+    _SHARD.update(rows)
+
+def _changeShard(changes: dict[int, tuple[str, str, str, str] | None]):
+    """
+    Adds the rows to the worker's shard, and drops the positions without one.
+    """
+    for position, row in changes.items():
+        if row is None:
+            _SHARD.pop(position, None)
+        else:
+            _SHARD[position]= row
+
+def _searchShard(column: int, query: str) -> list[int]:
+    """
+    Returns the catalog positions of the worker's books whose column
+    contains the lowercase query, in catalog order.
+    """
+    return sorted(position for position, row in _SHARD.items() if query in row[column])
+
+def _shardRow(book: Book) -> tuple[str, str, str, str]:
+    """
+    Returns the book's searchable fields, lowercased the way a search
+    compares them.
+    """
+    return (str(book.title).lower(), str(book.author).lower(), str(book.genre).lower(), str(book.year))
+
+class _ShardFeed(_CatalogIndex):
+    """
+    Keeps the books added to and removed from a catalog since the shards
+    were last synced, by shard and catalog position. The searched fields
+    are part of a book's key, so books changed in place, like when they
+    are borrowed, don't reach the shards at all.
+    """
+    def __init__(self, field: str, shards: int, shardOf: Callable[[Book], int], position: Callable[[Book], int]):
+        super().__init__(field)
+        self.shardOf= shardOf
+        self.position= position
+        self.__lock= threading.Lock()
+        self.__books: dict[int, Book]= {}
+        self.__positions: dict[tuple, int]= {}
+        self.__changes: list[dict[int, tuple[str, str, str, str] | None]]= [{} for _ in range(shards)]
+        self.__reset= True
+
+    def add(self, book: Book):
+        self.place(self.position(book), book)
+
+    def place(self, position: int, book: Book):
+        """
+        Adds a book at the given catalog position.
+        """
+        with self.__lock:
+            self.__books[position]= book
+            self.__positions[book.key()]= position
+            self.__changes[self.shardOf(book)][position]= _shardRow(book)
+
+    def remove(self, book: Book):
+        with self.__lock:
+            position= self.__positions.pop(book.key())
+            del self.__books[position]
+            self.__changes[self.shardOf(book)][position]= None
+
+    def clear(self):
+        with self.__lock:
+            self.__books.clear()
+            self.__positions.clear()
+            for changes in self.__changes:
+                changes.clear()
+            self.__reset= True
+
+    def books(self, positions: Iterable[int]) -> list[Book]:
+        """
+        Returns the books at the positions, skipping those removed since.
+        """
+        with self.__lock:
+            return [self.__books[position] for position in positions if position in self.__books]
+
+    def take(self) -> tuple[bool, list[dict[int, tuple[str, str, str, str] | None]]]:
+        """
+        Returns whether the shards must be reloaded from scratch, and the
+        changes of every shard since the last call.
+        """
+        with self.__lock:
+            reset, changes= self.__reset, self.__changes
+            self.__reset= False
+            self.__changes= [{} for _ in changes]
+            return reset, changes
+
+class ShardedSearch:
+    """
+    Searches books on several processes. The books are partitioned by a
+    hash of their title, or by genre, and each worker process keeps its
+    shard loaded between searches. A query goes to every shard, or with
+    genre shards only to those holding a matching genre, and the matches
+    are merged back in the order of the books. The books added to and
+    removed from a searched Catalog are sent to their shard before the
+    next search.
+    """
+    def __init__(self, books: Catalog | list[Book], workers: int= None, partition: str= 'title'):
+        if partition not in PARTITIONS:
+            raise ValueError(f"Unknown partition '{partition}'")
+        self.partition= partition
+        self.workers= workers if workers else os.cpu_count() or 1
+        self.source= books
+        # the shard holding each genre, for genre partitions
+        self.__genreShards: dict[Genre, int]= {}
+        position= books.position if isinstance(books, Catalog) else None
+        self.__feed= _ShardFeed(f'shards-{id(self)}', self.workers, self.__shardOf, position)
+        # one single-process pool per shard, so every shard stays in one worker
+        self.__executors= [ProcessPoolExecutor(max_workers=1) for _ in range(self.workers)]
+        self.load()
+
+    def __enter__(self) -> 'ShardedSearch':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __shardOf(self, book: Book) -> int:
+        """
+        Internal method to get the shard a book belongs to.
+        """
+        if self.partition == 'genre':
+            return self.__genreShards.setdefault(book.genre, zlib.crc32(str(book.genre).encode()) % self.workers)
+        return zlib.crc32(str(book.title).encode()) % self.workers
+
+    def load(self):
+        """
+        Partitions the books again and reloads every shard. A searched
+        list is only read here, while a Catalog's changes are followed.
+        """
+        self.__feed.clear()
+        if isinstance(self.source, Catalog):
+            # filled with the catalog's books the next time it is used
+            self.source.addIndex(self.__feed)
+        else:
+            for position, book in enumerate(self.source):
+                self.__feed.place(position, book)
+        self.__sync()
+
+    def __sync(self):
+        """
+        Internal method to send the changes made since the last sync to
+        their shards.
+        """
+        if isinstance(self.source, Catalog):
+            self.source.getIndex(self.__feed.field)
+        reset, changes= self.__feed.take()
+        task= _loadShard if reset else _changeShard
+        futures= [executor.submit(task, shard) for executor, shard in zip(self.__executors, changes)
+                  if reset or shard]
+        for future in futures:
+            future.result()
+
+    def __targets(self, field: str, query: str) -> Iterable[ProcessPoolExecutor]:
+        """
+        Internal method to get the workers that may hold matches.
+        """
+        if self.partition == 'genre' and field == 'genre':
+            shards= {shard for genre, shard in self.__genreShards.items() if query in str(genre).lower()}
+            return [self.__executors[shard] for shard in sorted(shards)]
+        return self.__executors
+
+    def search(self, field: str, query: str) -> list[Book]:
+        """
+        Returns the books whose field contains the query, ignoring case,
+        in the order of the books.
+        """
+        if field not in FIELDS:
+            raise ValueError(f"Can't search by '{field}'")
+        self.__sync()
+        query= str(query).lower()
+        futures= [executor.submit(_searchShard, FIELDS[field], query) for executor in self.__targets(field, query)]
+        return self.__feed.books(heapq.merge(*(future.result() for future in futures)))
+
+    def close(self):
+        """
+        Stops the worker processes, and stops following the catalog.
+        """
+        if isinstance(self.source, Catalog):
+            self.source.removeIndex(self.__feed.field)
+        for executor in self.__executors:
+            executor.shutdown(wait=True)
+        self.__executors= []
@@ -0,0 +1,55 @@
+import unittest
+from database.book import Book, Genre
+from database.catalog import Catalog
+from database.shards import ShardedSearch
+from database.strategies import SearchByGenre, SearchByTitle
+
+class TestShardedSearch(unittest.TestCase):
+    def setUp(self):
+        genres = [Genre.FICTION, Genre.SCIENCE_FICTION, Genre.ROMANCE, Genre.FANTASY]
+        self.books = [Book(f"Book {i}", f"Author {i % 7}", False, 1, genres[i % 4], 1900 + i) for i in range(60)]
+
+    def scan(self, field: str, query: str) -> list[Book]:
+        return [book for book in self.books if query.lower() in str(getattr(book, field)).lower()]
+
+    def test_matches_scan_in_order(self):
+        for partition in ("title", "genre"):
+            with ShardedSearch(self.books, workers=3, partition=partition) as shards:
+                for field, query in [("title", "book 1"), ("author", "AUTHOR 3"), ("genre", "fiction"), ("year", "195")]:
+                    self.assertEqual(shards.search(field, query), self.scan(field, query))
+                self.assertEqual(shards.search("title", "missing"), [])
+
+    def test_catalog_changes(self):
+        catalog = Catalog(self.books[:10])
+        with ShardedSearch(catalog, workers=2) as shards:
+            self.assertEqual(len(shards.search("title", "book")), 10)
+            catalog.add(Book("New Book", "Someone", False, 1, Genre.FICTION, 2024))
+            catalog.remove(self.books[1])
+            catalog.replace(self.books[3], Book("Renamed", "Author 3", False, 1, Genre.FICTION, 1903))
+            self.assertEqual([book.title for book in shards.search("title", "e")],
+                             [book.title for book in catalog if "e" in book.title.lower()])
+            catalog.clear()
+            catalog.add(self.books[5])
+            self.assertEqual(shards.search("title", "book"), [self.books[5]])
+
+    def test_closed_stops_following(self):
+        catalog = Catalog(self.books[:10])
+        with ShardedSearch(catalog, workers=2) as shards:
+            field = f"shards-{id(shards)}"
+            self.assertTrue(catalog.hasIndex(field))
+        self.assertFalse(catalog.hasIndex(field))
+
+    def test_strategy(self):
+        with ShardedSearch(self.books, workers=2, partition="genre") as shards:
+            self.assertEqual(SearchByGenre(self.books, shards).search("romance"), self.scan("genre", "romance"))
+            with self.assertRaises(ValueError):
+                SearchByTitle(self.books, shards).search("missing")
+            subset = self.books[:4]
+            self.assertEqual(SearchByGenre(subset, shards).search("romance"), [self.books[2]])
+
+    def test_unknown_partition(self):
+        with self.assertRaises(ValueError):
+            ShardedSearch(self.books, partition="author")
+
+if __name__ == '__main__':
+    unittest.main()
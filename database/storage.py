@@ -0,0 +1,469 @@
+import argparse
+import csv
+import os
+import sqlite3
+import tempfile
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import IO, Iterable, Iterator
+from Users.directory import UserDirectory
+from Users.user import User
+from database.book import Book, BookFactory
+from database.instrumentation import INSTRUMENTATION
+from database.journal import Journal
+
+_CSV_HEADER= ["title","author","is_loaned","copies","genre","year","loaned_copies"]
+_WAITING_HEADER= ["title","author","genre","year","name"]
+
+# files kept by older versions, replaced by the loaned_copies column
+_LEGACY_CSVS= ('available_books.csv', 'loaned_books.csv')
+
+def _csvRows(file: str) -> Iterator[list[str]]:
+    """
+    Yields the rows of the csv one at a time, without its header.
+    """
+    with open(file, 'r', newline='') as bookfile:
+        booklist = csv.reader(bookfile, delimiter=',')
+        next(booklist, None)
+        yield from booklist
+
+def _csvToBook(file: str) -> Iterator[Book]:
+    """
+    Yields Book objects from the csv.
+    """
+    for row in _csvRows(file):
+        yield BookFactory.create_book_from_row(row)
+
+def _csvAsMatrix(file: str) -> list[list[str]]:
+    """
+    Returns a matrix representing the rows of the csv file.
+    """
+    with open(file, 'r', newline='') as f:
+        return list(csv.reader(f, delimiter=','))
+
+@contextmanager
+def _atomicWrite(file: str) -> Iterator[IO[str]]:
+    """
+    Opens a temporary file next to the given one for writing, and moves
+    it over the file once it was written. Readers and a crash midway see
+    either the old file or the new one, never a partial one.
+    """
+    folder= os.path.dirname(os.path.abspath(file))
+    handle, temp= tempfile.mkstemp(prefix=f'.{os.path.basename(file)}.', dir=folder)
+    try:
+        with os.fdopen(handle, 'w', newline='') as temporary:
+            yield temporary
+            temporary.flush()
+            os.fsync(temporary.fileno())
+        # keep the file's permissions, mkstemp makes it private
+        try:
+            os.chmod(temp, os.stat(file).st_mode & 0o777)
+        except FileNotFoundError:
+            os.chmod(temp, 0o644)
+        os.replace(temp, file)
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+
+def _ifFileExists(file: str) -> bool:
+    """
+    Returns True if file path exists, False otherwise.
+    """
+    try:
+        with open(file, 'r'):
+            pass
+    except OSError:
+        return False
+    return True
+
+class _Storage(ABC):
+    """
+    Base interface for where the library keeps its books and users.
+    """
+    @abstractmethod
+    def loadRows(self) -> Iterator[list[str]]:
+        """
+        Yields the csv row of every stored book, in catalog order.
+        """
+        pass
+
+    def loadBooks(self) -> list[Book]:
+        """
+        Returns all the stored books, in catalog order.
+        """
+        return [BookFactory.create_book_from_row(row) for row in self.loadRows()]
+
+    @abstractmethod
+    def loadUsers(self) -> list[User]:
+        """
+        Returns all the stored users.
+        """
+        pass
+
+    @abstractmethod
+    def record(self, action: str, book: Book):
+        """
+        Stores an action made on a book. The book is given in its state
+        after the action.
+        """
+        pass
+
+    def recordMany(self, records: list[tuple[str, Book]]):
+        """
+        Stores many actions at once.
+        """
+        for action, book in records:
+            self.record(action, book)
+
+    @abstractmethod
+    def addUser(self, user: User):
+        """
+        Stores a newly registered user.
+        """
+        pass
+
+    @abstractmethod
+    def updateUser(self, user: User):
+        """
+        Stores the new credentials of an existing user.
+        """
+        pass
+
+    @abstractmethod
+    def loadWaitingLists(self) -> dict[tuple[str, str, str, str], list[str]]:
+        """
+        Returns the stored waiting lists, by the (title, author, genre, year)
+        of their book, first in line first.
+        """
+        pass
+
+    @abstractmethod
+    def recordWaitingList(self, book: Book):
+        """
+        Stores the current waiting list of the book.
+        """
+        pass
+
+    @staticmethod
+    def _waitingKey(book: Book) -> tuple[str, str, str, str]:
+        """
+        Returns the key a book's waiting list is stored by.
+        """
+        return (book.title, book.author, str(book.genre), str(book.year))
+
+    def needsCompaction(self) -> bool:
+        """
+        Returns True if the storage should be rewritten from the catalog.
+        """
+        return False
+
+    def compact(self, rows: Iterable[list[str]]):
+        """
+        Rewrites the storage from the given book rows.
+        """
+        pass
+
+class CSVStorage(_Storage):
+    """
+    Keeps the books in a csv snapshot plus a journal of the actions made
+    since it was written, and the users in a csv file.
+    """
+    def __init__(self, bookfile: str= 'books.csv', userfile: str= 'users.csv', journal: Journal= None):
+        self.bookfile= bookfile
+        self.userfile= userfile
+        self.journal= journal if journal is not None else Journal(os.path.join(os.path.dirname(bookfile), 'journal.csv'))
+        folder= os.path.dirname(bookfile)
+        self.waitingfile= os.path.join(folder, 'waiting.csv')
+        self.__waiting: dict[tuple[str, str, str, str], list[str]] | None= None
+        self.__legacy= [os.path.join(folder, csvfile) for csvfile in _LEGACY_CSVS
+                        if _ifFileExists(os.path.join(folder, csvfile))]
+
+    def loadRows(self) -> Iterator[list[str]]:
+        """
+        Streams the snapshot rows, with the journaled actions applied on
+        top. Only the journal is read into memory, the snapshot is never
+        held as a whole.
+        """
+        # get loaned copies from older versions' files
+        loaned: dict[tuple, int]= None
+        loanedfile= os.path.join(os.path.dirname(self.bookfile), 'loaned_books.csv')
+        if loanedfile in self.__legacy:
+            loaned= {Book.rowKey(row): int(row[3]) for row in _csvRows(loanedfile)}
+        # the latest state of every book changed since the last snapshot
+        changes: dict[tuple, list[str] | None]= {}
+        for action, book in self.journal.records():
+            changes[book.key()]= None if action == 'remove' else book.toRow()
+        for row in _csvRows(self.bookfile):
+            key= Book.rowKey(row)
+            if loaned is not None:
+                row= row[:6] + [str(loaned.get(key, 0))]
+                row[2]= 'Yes' if int(row[6]) >= int(row[3]) else 'No'
+            if key in changes:
+                row= changes.pop(key)
+                if row is None:
+                    continue
+            yield row
+        # books added since the last snapshot
+        for row in changes.values():
+            if row is not None:
+                yield row
+
+    def loadUsers(self) -> list[User]:
+        if not _ifFileExists(self.userfile):
+            with open(self.userfile, 'x', newline='') as userfile:
+                userwriter= csv.writer(userfile, delimiter=',')
+                userwriter.writerow(["name","password","salt"])
+            return []
+        return [User.parseUser(row) for row in _csvAsMatrix(self.userfile)[1:]]
+
+    def record(self, action: str, book: Book):
+        self.journal.append(action, book)
+
+    def recordMany(self, records: list[tuple[str, Book]]):
+        self.journal.extend(records)
+
+    def addUser(self, user: User):
+        with open(self.userfile, 'a', newline='') as userfile:
+            start= userfile.tell()
+            userwriter= csv.writer(userfile, delimiter=',')
+            userwriter.writerow(user.toList())
+            INSTRUMENTATION.countWritten(userfile.tell() - start)
+
+    def updateUser(self, user: User):
+        rows= _csvAsMatrix(self.userfile)
+        INSTRUMENTATION.countRead(os.path.getsize(self.userfile))
+        # a later row wins if older versions stored the name twice
+        for i in range(len(rows) - 1, 0, -1):
+            if rows[i] and rows[i][0] == user.name:
+                rows[i]= user.toList()
+                break
+        else:
+            raise ValueError("User doesn't exist.")
+        with _atomicWrite(self.userfile) as userfile:
+            csv.writer(userfile, delimiter=',').writerows(rows)
+            INSTRUMENTATION.countWritten(userfile.tell())
+
+    def loadWaitingLists(self) -> dict[tuple[str, str, str, str], list[str]]:
+        if self.__waiting is None:
+            self.__waiting= {}
+            if _ifFileExists(self.waitingfile):
+                for row in _csvRows(self.waitingfile):
+                    self.__waiting.setdefault(tuple(row[:4]), []).append(row[4])
+        return {key: list(names) for key, names in self.__waiting.items()}
+
+    def recordWaitingList(self, book: Book):
+        self.loadWaitingLists()
+        names= book.getWaitingList()
+        if names:
+            self.__waiting[_Storage._waitingKey(book)]= names
+        else:
+            self.__waiting.pop(_Storage._waitingKey(book), None)
+        # waiting lists are short and change rarely, so the file is rewritten
+        with _atomicWrite(self.waitingfile) as waitingfile:
+            writer= csv.writer(waitingfile, delimiter=',')
+            writer.writerow(_WAITING_HEADER)
+            writer.writerows([*key, name] for key, names in self.__waiting.items() for name in names)
+            INSTRUMENTATION.countWritten(waitingfile.tell())
+
+    def needsCompaction(self) -> bool:
+        # older versions' files are folded into the snapshot too
+        return self.journal.needsCompaction() or bool(self.__legacy)
+
+    def compact(self, rows: Iterable[list[str]]):
+        """
+        Rewrites the csv snapshot from the given book rows, clears the
+        journal and removes older versions' files.
+        """
+        with _atomicWrite(self.bookfile) as bookfile:
+            writer= csv.writer(bookfile, delimiter=',')
+            writer.writerow(_CSV_HEADER)
+            writer.writerows(rows)
+            INSTRUMENTATION.countWritten(bookfile.tell())
+        self.journal.clear()
+        for csvfile in self.__legacy:
+            os.remove(csvfile)
+        self.__legacy.clear()
+
+class SQLiteStorage(_Storage):
+    """
+    Keeps the books and users in an SQLite database. Every action is
+    stored in its own transaction, and the book columns used to look
+    books up are indexed.
+    """
+    def __init__(self, file: str= 'library.db'):
+        self.file= file
+        self.connection= sqlite3.connect(file, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        with self.connection:
+            self.connection.executescript("""
+                CREATE TABLE IF NOT EXISTS books (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    title TEXT NOT NULL,
+                    author TEXT NOT NULL,
+                    is_loaned TEXT NOT NULL,
+                    copies INTEGER NOT NULL,
+                    genre TEXT NOT NULL,
+                    year INTEGER NOT NULL,
+                    loaned_copies INTEGER NOT NULL,
+                    UNIQUE (title, author, genre, year)
+                );
+                CREATE INDEX IF NOT EXISTS books_title ON books (title);
+                CREATE INDEX IF NOT EXISTS books_author ON books (author);
+                CREATE INDEX IF NOT EXISTS books_genre ON books (genre);
+                CREATE INDEX IF NOT EXISTS books_year ON books (year);
+                CREATE TABLE IF NOT EXISTS users (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    password TEXT NOT NULL,
+                    salt TEXT NOT NULL,
+                    normalized_name TEXT
+                );
+                CREATE TABLE IF NOT EXISTS waiting (
+                    title TEXT NOT NULL,
+                    author TEXT NOT NULL,
+                    genre TEXT NOT NULL,
+                    year INTEGER NOT NULL,
+                    position INTEGER NOT NULL,
+                    name TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS waiting_book ON waiting (title, author, genre, year);
+            """)
+            self.__uniqueUsers()
+
+    def __uniqueUsers(self):
+        """
+        Internal method to key the users by their normalized name, as the
+        UserDirectory does. Databases of older versions may hold a name
+        twice, in which case the later account is kept.
+        """
+        columns= [row[1] for row in self.connection.execute("PRAGMA table_info(users)")]
+        if 'normalized_name' not in columns:
+            self.connection.execute("ALTER TABLE users ADD COLUMN normalized_name TEXT")
+        rows= self.connection.execute("SELECT id, name FROM users WHERE normalized_name IS NULL").fetchall()
+        if rows:
+            self.connection.executemany("UPDATE users SET normalized_name = ? WHERE id = ?",
+                                        ((UserDirectory.normalize(name), rowid) for rowid, name in rows))
+            self.connection.execute(
+                "DELETE FROM users WHERE id NOT IN (SELECT MAX(id) FROM users GROUP BY normalized_name)")
+        self.connection.executescript("""
+            DROP INDEX IF EXISTS users_name;
+            CREATE UNIQUE INDEX IF NOT EXISTS users_normalized_name ON users (normalized_name);
+        """)
+
+    def loadRows(self) -> Iterator[list[str]]:
+        rows= self.connection.execute(
+            "SELECT title, author, is_loaned, copies, genre, year, loaned_copies FROM books ORDER BY id")
+        for row in rows:
+            yield [str(field) for field in row]
+
+    def loadUsers(self) -> list[User]:
+        rows= self.connection.execute("SELECT name, password, salt FROM users ORDER BY id")
+        return [User.parseUser(list(row)) for row in rows]
+
+    def record(self, action: str, book: Book):
+        with self.connection:
+            self.__write(action, book)
+
+    def recordMany(self, records: list[tuple[str, Book]]):
+        with self.connection:
+            for action, book in records:
+                self.__write(action, book)
+
+    def __write(self, action: str, book: Book):
+        """
+        Internal method to write an action without committing it.
+        """
+        if action == 'remove':
+            self.connection.execute(
+                "DELETE FROM books WHERE title = ? AND author = ? AND genre = ? AND year = ?",
+                (book.title, book.author, str(book.genre), book.year))
+        else:
+            self.connection.execute("""
+                INSERT INTO books (title, author, is_loaned, copies, genre, year, loaned_copies)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (title, author, genre, year) DO UPDATE SET
+                    is_loaned = excluded.is_loaned,
+                    copies = excluded.copies,
+                    loaned_copies = excluded.loaned_copies
+                """, book.toRow())
+
+    @staticmethod
+    def __userRow(user: User) -> list[str]:
+        """
+        Internal method to get the columns a user is stored with.
+        """
+        return [*user.toList(), UserDirectory.normalize(user.name)]
+
+    def addUser(self, user: User):
+        with self.connection:
+            self.connection.execute("INSERT INTO users (name, password, salt, normalized_name) VALUES (?, ?, ?, ?)",
+                                    SQLiteStorage.__userRow(user))
+
+    def updateUser(self, user: User):
+        name, password, salt, normalized= SQLiteStorage.__userRow(user)
+        with self.connection:
+            self.connection.execute("UPDATE users SET password = ?, salt = ? WHERE normalized_name = ?",
+                                    (password, salt, normalized))
+
+    def loadWaitingLists(self) -> dict[tuple[str, str, str, str], list[str]]:
+        waiting: dict[tuple[str, str, str, str], list[str]]= {}
+        rows= self.connection.execute(
+            "SELECT title, author, genre, year, name FROM waiting ORDER BY title, author, genre, year, position")
+        for title, author, genre, year, name in rows:
+            waiting.setdefault((title, author, genre, str(year)), []).append(name)
+        return waiting
+
+    def recordWaitingList(self, book: Book):
+        with self.connection:
+            self.connection.execute(
+                "DELETE FROM waiting WHERE title = ? AND author = ? AND genre = ? AND year = ?",
+                (book.title, book.author, str(book.genre), book.year))
+            self.connection.executemany(
+                "INSERT INTO waiting (title, author, genre, year, position, name) VALUES (?, ?, ?, ?, ?, ?)",
+                ((book.title, book.author, str(book.genre), book.year, i, name)
+                 for i, name in enumerate(book.getWaitingList())))
+
+    def importCSV(self, bookfile: str= 'books.csv', userfile: str= 'users.csv') -> tuple[int, int]:
+        """
+        Copies the books, users and waiting lists of a csv library into the
+        database, in one transaction. Books and waiting lists already in the
+        database are replaced, users already in it are kept, so importing
+        again doesn't duplicate anything. Returns the number of books and
+        users imported.
+        """
+        source= CSVStorage(bookfile, userfile)
+        books= source.loadBooks()
+        users= UserDirectory(source.loadUsers())
+        waiting= source.loadWaitingLists()
+        with self.connection:
+            for book in books:
+                self.__write('add', book)
+            added= self.connection.executemany(
+                "INSERT INTO users (name, password, salt, normalized_name) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (normalized_name) DO NOTHING",
+                (SQLiteStorage.__userRow(user) for user in users)).rowcount
+            self.connection.executemany(
+                "DELETE FROM waiting WHERE title = ? AND author = ? AND genre = ? AND year = ?",
+                waiting.keys())
+            self.connection.executemany(
+                "INSERT INTO waiting (title, author, genre, year, position, name) VALUES (?, ?, ?, ?, ?, ?)",
+                ((*key, i, name) for key, names in waiting.items() for i, name in enumerate(names)))
+        return len(books), added
+
+    def close(self):
+        """
+        Closes the database connection.
+        """
+        self.connection.close()
+
+if __name__ == '__main__':
+    parser= argparse.ArgumentParser(description="Import a csv library into an SQLite database.")
+    parser.add_argument('--books', default='books.csv', help="the books csv file")
+    parser.add_argument('--users', default='users.csv', help="the users csv file")
+    parser.add_argument('--db', default='library.db', help="the database file to import into")
+    args= parser.parse_args()
+    storage= SQLiteStorage(args.db)
+    books, users= storage.importCSV(args.books, args.users)
+    storage.close()
+    print(f"Imported {books} books and {users} users into {args.db}.")
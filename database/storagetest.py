@@ -0,0 +1,105 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from database.journal import Journal
+from database.storage import CSVStorage, SQLiteStorage
+from database.book import Book, Genre
+from Users.user import User
+
+class TestStorage(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.bookfile = os.path.join(self.dir.name, "books.csv")
+        self.userfile = os.path.join(self.dir.name, "users.csv")
+        with open(self.bookfile, "w") as f:
+            f.write("title,author,is_loaned,copies,genre,year\n")
+            f.write("Test Book,Test Author,Yes,2,Fiction,2023\n")
+        self.book = Book("Test Book", "Test Author", False, 1, Genre.FICTION, 2023)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_csv_replay(self):
+        storage = CSVStorage(self.bookfile, self.userfile)
+        book = storage.loadBooks()[0]
+        self.assertEqual(book.loaned_copies, 2)
+        book.loaned_copies = 1
+        storage.record("return", book)
+        reloaded = CSVStorage(self.bookfile, self.userfile).loadBooks()
+        self.assertEqual(reloaded[0].loaned_copies, 1)
+
+    def test_csv_given_journal(self):
+        journal = Journal(os.path.join(self.dir.name, "custom.csv"), compactEvery=2)
+        storage = CSVStorage(self.bookfile, self.userfile, journal)
+        self.assertIs(storage.journal, journal)
+        storage.record("add", self.book)
+        self.assertFalse(storage.needsCompaction())
+        storage.record("add", self.book)
+        self.assertTrue(storage.needsCompaction())
+        storage.compact(storage.loadRows())
+        self.assertEqual(len(journal), 0)
+        self.assertFalse(os.path.exists(os.path.join(self.dir.name, "journal.csv")))
+
+    def test_sqlite_record(self):
+        storage = SQLiteStorage(os.path.join(self.dir.name, "library.db"))
+        storage.record("add", self.book)
+        self.book.copies = 3
+        storage.record("add", self.book)
+        self.assertEqual([book.copies for book in storage.loadBooks()], [3])
+        storage.record("remove", self.book)
+        self.assertEqual(storage.loadBooks(), [])
+        storage.close()
+
+    def test_sqlite_import(self):
+        source = CSVStorage(self.bookfile, self.userfile)
+        source.loadUsers()
+        source.addUser(User("TestUser", "hash", "salt"))
+        storage = SQLiteStorage(os.path.join(self.dir.name, "library.db"))
+        self.assertEqual(storage.importCSV(self.bookfile, self.userfile), (1, 1))
+        self.assertEqual(storage.loadBooks()[0].loaned_copies, 2)
+        self.assertEqual(storage.loadUsers()[0].name, "TestUser")
+        storage.close()
+
+    def test_sqlite_import_twice(self):
+        source = CSVStorage(self.bookfile, self.userfile)
+        source.loadUsers()
+        source.addUser(User("TestUser", "hash", "salt"))
+        self.book.addToWaitingList("user1")
+        source.recordWaitingList(self.book)
+        storage = SQLiteStorage(os.path.join(self.dir.name, "library.db"))
+        self.assertEqual(storage.importCSV(self.bookfile, self.userfile), (1, 1))
+        self.assertEqual(storage.importCSV(self.bookfile, self.userfile), (1, 0))
+        self.assertEqual(len(storage.loadBooks()), 1)
+        self.assertEqual(len(storage.loadUsers()), 1)
+        self.assertEqual(list(storage.loadWaitingLists().values()), [["user1"]])
+        with self.assertRaises(sqlite3.IntegrityError):
+            storage.addUser(User(" testuser ", "hash", "salt"))
+        storage.close()
+
+    def test_sqlite_duplicate_users_upgraded(self):
+        file = os.path.join(self.dir.name, "library.db")
+        connection = sqlite3.connect(file)
+        with connection:
+            connection.execute("CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                               "name TEXT NOT NULL, password TEXT NOT NULL, salt TEXT NOT NULL)")
+            connection.executemany("INSERT INTO users (name, password, salt) VALUES (?, ?, ?)",
+                                   [("TestUser", "old", "salt"), ("testuser", "new", "salt")])
+        connection.close()
+        storage = SQLiteStorage(file)
+        self.assertEqual([user.toList() for user in storage.loadUsers()], [["testuser", "new", "salt"]])
+        storage.updateUser(User("TESTUSER", "newer", "salt"))
+        self.assertEqual(storage.loadUsers()[0].toList()[1], "newer")
+        storage.close()
+
+    def test_sqlite_waiting_list(self):
+        storage = SQLiteStorage(os.path.join(self.dir.name, "library.db"))
+        self.book.addToWaitingList("user1")
+        self.book.addToWaitingList("user2")
+        storage.recordWaitingList(self.book)
+        self.assertEqual(list(storage.loadWaitingLists().values()), [["user1", "user2"]])
+        self.book.popWaitingList()
+        self.book.popWaitingList()
+        storage.recordWaitingList(self.book)
+        self.assertEqual(storage.loadWaitingLists(), {})
+        storage.close()
@@ -1,6 +1,9 @@
 from abc import ABC, abstractmethod
 from database.book import Book
+from database.catalog import Catalog
+from database.indexes import ALPHABETICAL, GENRES, genreKey, titleKey
 from database.iterators import BookIterator
+from database.shards import ShardedSearch
 
 class _BooklistStrategy(ABC):
     """
@@ -34,17 +37,37 @@ class _SearchInterface(_BooklistStrategy):
 class _SearchStrategy(_SearchInterface):
     """
     Base class for a search implementation of the Strategy design pattern.
+    Searching a Catalog with an index over the field uses the index
+    instead of going over every book. Otherwise, if sharded search built
+    over these same books is given, its worker processes go over them.
     """
+    def __init__(self, books: list[Book], shards: ShardedSearch= None):
+        super().__init__(books)
+        self.shards= shards
+
     def search(self, query: str, field: str) -> list[Book]:
+        if isinstance(self.books, Catalog) and self.books.hasIndex(field):
+            responses = self.books.search(field, query)
+        elif self.shards is not None and self.shards.source is self.books:
+            responses = self.shards.search(field, query)
+        else:
+            responses = self.__scan(query, field)
+        if not responses:
+            raise ValueError("No books found.")
+        return responses
+
+    def __scan(self, query: str, field: str) -> list[Book]:
+        """
+        Internal method to search by going over every book.
+        """
         responses = []
-        bookstack = BookIterator(self.books)
+        books = self.books.toList() if isinstance(self.books, Catalog) else self.books
+        bookstack = BookIterator(books)
         while bookstack.hasNext():
             book = bookstack.next()
             attribute = getattr(book, field)
             if query.lower() in str(attribute).lower():
                 responses.append(book)
-        if not responses:
-            raise ValueError("No books found.")
         return responses
 
 class ViewBooklist(_ViewStrategy):
@@ -97,33 +120,67 @@ class BooklistDecorator(_SearchInterface, _ViewStrategy):
 
 class PopularDecorator(BooklistDecorator):
     """
-    Sorts list based on book popularity.
+    Sorts list based on book popularity, and keeps the k most popular.
+    On a Catalog, the 'popularity' and 'demand' rankings are used
+    instead of sorting.
     """
+    def __init__(self, component: _BooklistStrategy, k: int= 10):
+        super().__init__(component)
+        self.k= k
+
+    def __ranked(self, field: str, key) -> list[Book]:
+        """
+        Internal method to get the k books ranked highest by the field.
+        """
+        books= self._comp.books
+        if isinstance(books, Catalog) and books.hasIndex(field):
+            return books.getIndex(field).top(self.k)
+        return sorted(books, key=key, reverse=True)[:self.k]
+
     def view(self):
-        return sorted(self._comp.books, key=lambda x: x.copies, reverse=True)[:10]
+        return self.__ranked('popularity', lambda x: x.loaned_copies)
 
     def search(self, query: str) -> list[Book]:
-        sorted_books= sorted(self._comp.books, key=lambda x: x.copies + len(x.getWaitingList()), reverse=True)[:10]
+        sorted_books= self.__ranked('demand', lambda x: x.loaned_copies + x.waitingCount())
         return self._comp.search(query, sorted_books)
 
-class AlphabeticalDecorator(BooklistDecorator):
+class _OrderedDecorator(BooklistDecorator):
     """
-    Sorts results based on alphabetical order.
+    Base decorator for sorting the booklist. On a Catalog, its sorted
+    index is read instead of sorting.
     """
+    FIELD= None
+
+    @staticmethod
+    def key(book: Book):
+        """
+        Returns the value the books are sorted by.
+        """
+        pass
+
+    def _sorted(self) -> list[Book]:
+        books= self._comp.books
+        if isinstance(books, Catalog) and books.hasIndex(self.FIELD):
+            return books.getIndex(self.FIELD).books()
+        return sorted(books, key=self.key)
+
     def view(self):
-        return sorted(self._comp.books, key=lambda x: x.title)
-    
+        return self._sorted()
+
     def search(self, query: str) -> list[Book]:
-        sorted_books= sorted(self._comp.books, key=lambda x: x.title)
-        return self._comp.search(query, sorted_books)
-    
-class GenreDecorator(BooklistDecorator):
+        return self._comp.search(query, self._sorted())
+
+class AlphabeticalDecorator(_OrderedDecorator):
+    """
+    Sorts results based on alphabetical order.
+    """
+    FIELD= ALPHABETICAL
+    key= staticmethod(titleKey)
+
+class GenreDecorator(_OrderedDecorator):
     """
     Sorts results based on genre.
     """
-    def view(self):
-        return sorted(self._comp.books, key= lambda x: str(x.genre))
-    
-    def search(self, query: str) -> list[Book]:
-        sorted_books= sorted(self._comp.books, key= lambda x: str(x.genre))
-        return self._comp.search(query, sorted_books)
\ No newline at end of file
+    FIELD= GENRES
+    key= staticmethod(genreKey)
+
@@ -0,0 +1,16 @@
+import argparse
+import csv
+import database.library as library
+
+parser= argparse.ArgumentParser(description="Add the books of a csv file to the library.")
+parser.add_argument('file', help="csv file with the books.csv columns, and a header row")
+args= parser.parse_args()
+
+lib= library.Library()
+with open(args.file, 'r', newline='') as bookfile:
+    rows= csv.reader(bookfile, delimiter=',')
+    next(rows, None)
+    added, rejected= lib.addBooks(rows)
+for row, reason in rejected:
+    print(f"Skipped {row}: {reason}")
+print(f"Added {added} books, skipped {len(rejected)}.")
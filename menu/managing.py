@@ -95,6 +95,7 @@ class ChoosePage(gui.Page):
             self.booklist= main.LIB.viewBooklist("loaned", log= False)
         else:
             self.booklist= main.LIB.viewBooklist("all", log= False)
+        self.generation= main.LIB.generation()
         self.selected= tk.StringVar()
         self.selected.set("Choose Book")
         elements= [
@@ -129,6 +130,10 @@ class ChoosePage(gui.Page):
         super().__init__(elements)
 
     def refresh(self):
+        # the books didn't change since the list was made
+        if self.generation == main.LIB.generation():
+            return
+        self.generation= main.LIB.generation()
         if self.loaned:
             self.booklist= main.LIB.viewBooklist("loaned", log= False)
         else:
@@ -17,6 +17,7 @@ class ViewPage(gui.Page):
             self.booklist= main.LIB.sortByGenre(booklist)
         self.view= view
         self.sort= sort
+        self.generation= main.LIB.generation()
         # create table
         table= gui.Table(main.ROOT, 
                   ("Title", "Author", "Is Loaned", "Copies", "Genre", "Year"),
@@ -36,6 +37,10 @@ class ViewPage(gui.Page):
         ])
 
     def refresh(self):
+        # the books didn't change since the table was made
+        if self.generation == main.LIB.generation():
+            return
+        self.generation= main.LIB.generation()
         self.booklist= main.LIB.viewBooklist(self.view, log=False)
         if self.sort == "abc":
             self.booklist= main.LIB.sortByTitle(self.booklist)
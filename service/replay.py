@@ -0,0 +1,199 @@
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import Future
+from typing import Any, Iterable, Iterator
+import database.library as library
+from database.book import Book, BookFactory
+from service.server import SEARCH_FIELDS, VIEW_CATEGORIES, bookToDict
+
+OPERATIONS= ('add', 'remove', 'borrow', 'return', 'search', 'view', 'login', 'register')
+
+class BatchReplay:
+    """
+    Streams JSON-lines operations through a Library. The operations are
+    applied in order, batchSize at a time, and the storage writes of each
+    group are flushed together once it is done. Logins don't touch the
+    books, so those of a group are verified in parallel while the rest
+    of the group runs.
+
+    Each line is an object with an "op" and its fields, like
+    {"op": "borrow", "loaner": ..., "title": ..., "author": ..., "genre": ..., "year": ...}
+    """
+    def __init__(self, lib: library.Library, batchSize: int= 500):
+        if batchSize < 1:
+            raise ValueError("The batch size must be at least 1.")
+        self.library= lib
+        self.batchSize= batchSize
+        # the number of operations and failures of each op
+        self.counts: dict[str, list[int]]= {}
+        self.elapsed= 0.0
+
+    def run(self, lines: Iterable[str]) -> Iterator[dict[str, Any]]:
+        """
+        Applies the operations, and yields the outcome of each in order.
+        """
+        group: list[tuple[int, str]]= []
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            group.append((number, line))
+            if len(group) >= self.batchSize:
+                yield from self.__runGroup(group)
+                group= []
+        if group:
+            yield from self.__runGroup(group)
+
+    def __runGroup(self, group: list[tuple[int, str]]) -> list[dict[str, Any]]:
+        """
+        Internal method to apply a group of operations with one flush.
+        """
+        started= time.perf_counter()
+        outcomes: list[dict[str, Any]]= []
+        logins: list[tuple[dict[str, Any], Future]]= []
+        with self.library.batch():
+            for number, line in group:
+                outcome= {'line': number, 'op': None, 'ok': True}
+                outcomes.append(outcome)
+                try:
+                    operation= json.loads(line)
+                    if not isinstance(operation, dict):
+                        raise ValueError("An operation must be a JSON object.")
+                    outcome['op']= op= operation.get('op')
+                    if op not in OPERATIONS:
+                        raise ValueError(f"Unknown operation '{op}'.")
+                    if op == 'login':
+                        logins.append((outcome, self.library.logInUserAsync(self.__field(operation, 'name'),
+                                                                            self.__field(operation, 'password'))))
+                        continue
+                    # a new user must exist before the logins after it are checked
+                    if op == 'register':
+                        self.__finishLogins(logins)
+                    outcome['result']= self.__apply(op, operation)
+                except Exception as e:
+                    outcome['ok']= False
+                    outcome['error']= str(e)
+            self.__finishLogins(logins)
+        self.elapsed+=time.perf_counter() - started
+        for outcome in outcomes:
+            counts= self.counts.setdefault(outcome['op'] or 'invalid', [0, 0])
+            counts[0]+=1
+            counts[1]+=not outcome['ok']
+        return outcomes
+
+    @staticmethod
+    def __finishLogins(logins: list[tuple[dict[str, Any], Future]]):
+        """
+        Internal method to wait for the logins being verified.
+        """
+        for outcome, future in logins:
+            try:
+                if not future.result():
+                    outcome['ok']= False
+                    outcome['error']= "Log in failed."
+            except Exception as e:
+                outcome['ok']= False
+                outcome['error']= str(e)
+        logins.clear()
+
+    def __apply(self, op: str, operation: dict[str, Any]) -> Any:
+        """
+        Internal method to apply an operation. Returns its result.
+        """
+        if op == 'add':
+            book= self.__book(operation)
+            if book.copies < 1:
+                raise ValueError("A book must have at least one copy.")
+            return bookToDict(self.library.addBook(book))
+        if op == 'remove':
+            self.library.removeBook(self.__book(operation))
+            return None
+        if op == 'borrow':
+            try:
+                return bookToDict(self.library.borrowBook(self.__field(operation, 'loaner'), self.__book(operation)).book)
+            except Exception as e:
+                if str(e) == "waitlist":
+                    return {'waitlisted': True}
+                raise
+        if op == 'return':
+            return bookToDict(self.library.returnBook(self.__field(operation, 'loaner'), self.__book(operation)).book)
+        if op == 'search':
+            searchby= str(operation.get('by', 'Title')).title()
+            if searchby not in SEARCH_FIELDS:
+                raise ValueError(f"Unknown search field '{searchby}'.")
+            try:
+                books= self.library.searchBooklist(self.__field(operation, 'query'), searchby)
+            except ValueError:
+                books= []
+            return {'count': len(books)}
+        if op == 'view':
+            category= operation.get('category', 'all')
+            if category not in VIEW_CATEGORIES:
+                raise ValueError(f"Unknown category '{category}'.")
+            return {'count': len(self.library.viewBooklist(category, log=False))}
+        if not self.library.registerUser(self.__field(operation, 'name'), self.__field(operation, 'password')):
+            raise ValueError("Could not register the user.")
+        return None
+
+    @staticmethod
+    def __field(operation: dict[str, Any], name: str) -> str:
+        """
+        Internal method to get a required field of an operation.
+        """
+        value= operation.get(name)
+        if value is None or value == '':
+            raise ValueError(f"Missing field '{name}'.")
+        return str(value)
+
+    @staticmethod
+    def __book(operation: dict[str, Any]) -> Book:
+        """
+        Internal method to create the book an operation names.
+        """
+        field= BatchReplay.__field
+        return BookFactory.create_book_from_input(field(operation, 'title'), field(operation, 'author'),
+                                                  field(operation, 'genre'), field(operation, 'year'),
+                                                  copies=operation.get('copies', 1))
+
+    def summary(self) -> dict[str, Any]:
+        """
+        Returns the number of operations and failures, overall and per
+        op, and the operations applied per second.
+        """
+        total= sum(count for count, _ in self.counts.values())
+        return {
+            'operations': total,
+            'failed': sum(failed for _, failed in self.counts.values()),
+            'seconds': round(self.elapsed, 3),
+            'ops_per_second': round(total / self.elapsed, 1) if self.elapsed else 0.0,
+            'per_op': {op: {'count': count, 'failed': failed} for op, (count, failed) in self.counts.items()}
+        }
+
+def main():
+    parser= argparse.ArgumentParser(description="Replay a JSON-lines file of operations through the library.")
+    parser.add_argument('file', help="the operations, one JSON object per line, or - for stdin")
+    parser.add_argument('--batch-size', type=int, default=500, help="operations flushed to storage together")
+    parser.add_argument('--out', default='-', help="file for the outcome of every operation, - for stdout")
+    args= parser.parse_args()
+    lib= library.Library()
+    replay= BatchReplay(lib, args.batch_size)
+    source= sys.stdin if args.file == '-' else open(args.file, 'r', encoding='utf-8')
+    out= sys.stdout if args.out == '-' else open(args.out, 'w', encoding='utf-8')
+    try:
+        for outcome in replay.run(source):
+            out.write(json.dumps(outcome, ensure_ascii=False) + '\n')
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+        lib.close()
+    summary= replay.summary()
+    print(f"{summary['operations']} operations, {summary['failed']} failed, in {summary['seconds']}s "
+          f"({summary['ops_per_second']} ops/s)", file=sys.stderr)
+    for op, counts in summary['per_op'].items():
+        print(f"  {op}: {counts['count']} ({counts['failed']} failed)", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
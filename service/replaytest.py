@@ -0,0 +1,66 @@
+import json
+import os
+import tempfile
+import unittest
+from database.library import Library
+from database.storage import CSVStorage
+from Users.hashing import PBKDF2Hasher
+from service.replay import BatchReplay
+
+BOOK = {"title": "Test Book", "author": "Test Author", "genre": "Fiction", "year": 2023}
+
+class TestBatchReplay(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.bookfile = os.path.join(self.dir.name, "books.csv")
+        self.userfile = os.path.join(self.dir.name, "users.csv")
+        self.journal = os.path.join(self.dir.name, "journal.csv")
+        with open(self.bookfile, "w") as f:
+            f.write("title,author,is_loaned,copies,genre,year\n")
+            f.write("Test Book,Test Author,No,2,Fiction,2023\n")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def library(self) -> Library:
+        library = Library(CSVStorage(self.bookfile, self.userfile), hasher=PBKDF2Hasher(1000))
+        self.addCleanup(library.close)
+        return library
+
+    def test_outcomes(self):
+        replay = BatchReplay(self.library(), batchSize=3)
+        lines = [json.dumps(operation) for operation in [
+            {"op": "register", "name": "user1", "password": "secret"},
+            {"op": "login", "name": "user1", "password": "secret"},
+            {"op": "login", "name": "user1", "password": "wrong"},
+            {"op": "borrow", "loaner": "user1", **BOOK},
+            {"op": "search", "by": "author", "query": "Test Author"},
+            {"op": "fly"},
+        ]] + ["not json"]
+        outcomes = list(replay.run(lines))
+        self.assertEqual([outcome["ok"] for outcome in outcomes], [True, True, False, True, True, False, False])
+        self.assertEqual(outcomes[4]["result"], {"count": 1})
+        summary = replay.summary()
+        self.assertEqual((summary["operations"], summary["failed"]), (7, 3))
+        self.assertEqual(summary["per_op"]["login"], {"count": 2, "failed": 1})
+
+    def test_add_existing_copies(self):
+        replay = BatchReplay(self.library())
+        outcomes = list(replay.run([json.dumps({"op": "add", "copies": 3, **BOOK})]))
+        self.assertEqual(outcomes[0]["result"]["copies"], 5)
+        book = [book for book in self.library().viewBooklist("all", log=False) if book.title == "Test Book"][0]
+        self.assertEqual(book.copies, 5)
+
+    def test_group_flushed_once(self):
+        replay = BatchReplay(self.library(), batchSize=100)
+        operations = [{"op": "borrow", "loaner": "user1", **BOOK}, {"op": "return", "loaner": "user1", **BOOK}] * 5
+        operations.append({"op": "borrow", "loaner": "user2", **BOOK})
+        outcomes = list(replay.run(json.dumps(operation) for operation in operations))
+        self.assertTrue(all(outcome["ok"] for outcome in outcomes))
+        with open(self.journal) as f:
+            self.assertEqual(len(f.readlines()), 1)
+        book = [book for book in self.library().viewBooklist("all", log=False) if book.title == "Test Book"][0]
+        self.assertEqual(book.loaned_copies, 1)
+
+if __name__ == '__main__':
+    unittest.main()
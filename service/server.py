@@ -0,0 +1,320 @@
+import argparse
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Any, Callable
+from urllib.parse import parse_qsl, urlsplit
+import database.library as library
+from database.book import Book, BookFactory
+
+# idle keep-alive connections are closed after this many seconds
+KEEP_ALIVE_TIMEOUT= 15.0
+MAX_BODY= 1_000_000
+VIEW_CATEGORIES= ('all', 'available', 'loaned', 'popular')
+SEARCH_FIELDS= ('Title', 'Author', 'Genre', 'Year')
+
+class _ServiceError(Exception):
+    """
+    An error answered to the client with its status.
+    """
+    def __init__(self, status: HTTPStatus, message: str, **fields: Any):
+        super().__init__(message)
+        self.status= status
+        self.fields= fields
+
+def bookToDict(book: Book) -> dict[str, Any]:
+    """
+    Returns the book's fields as a JSON object.
+    """
+    return {
+        'title': book.title,
+        'author': book.author,
+        'genre': str(book.genre),
+        'year': book.year,
+        'copies': book.copies,
+        'loaned_copies': book.loaned_copies,
+        'waiting': book.waitingCount()
+    }
+
+class LibraryService:
+    """
+    A headless HTTP/JSON front-end for a Library. Requests are read by
+    asyncio, so many clients can keep connections open at once, and the
+    library's blocking work runs on a thread pool.
+
+    GET  /books?category=all|available|loaned|popular
+    GET  /search?by=Title|Author|Genre|Year&query=...
+    POST /books          {title, author, genre, year, copies}
+    POST /books/remove   {title, author, genre, year}
+    POST /borrow         {loaner, title, author, genre, year}
+    POST /return         {loaner, title, author, genre, year}
+    POST /register       {name, password}
+    POST /login          {name, password}
+    """
+    def __init__(self, lib: library.Library, workers: int= None):
+        self.library= lib
+        self.__executor= ThreadPoolExecutor(max_workers=workers, thread_name_prefix='service')
+        self.__routes: dict[tuple[str, str], Callable[[dict], tuple[HTTPStatus, Any]]]= {
+            ('GET', '/books'): self.__view,
+            ('GET', '/search'): self.__search,
+            ('POST', '/books'): self.__add,
+            ('POST', '/books/remove'): self.__remove,
+            ('POST', '/borrow'): self.__borrow,
+            ('POST', '/return'): self.__return,
+            ('POST', '/register'): self.__register,
+            ('POST', '/login'): self.__login,
+        }
+        self.__server: asyncio.Server | None= None
+        # the tasks answering the open connections
+        self.__connections: set[asyncio.Task]= set()
+
+    async def start(self, host: str= '127.0.0.1', port: int= 8080) -> asyncio.Server:
+        """
+        Starts listening. Port 0 picks a free port.
+        """
+        self.__server= await asyncio.start_server(self.__connection, host, port)
+        return self.__server
+
+    async def serveForever(self, host: str= '127.0.0.1', port: int= 8080):
+        """
+        Serves requests until cancelled.
+        """
+        server= await self.start(host, port)
+        async with server:
+            await server.serve_forever()
+
+    async def close(self):
+        """
+        Stops listening, closes the open connections and waits for the
+        running library calls.
+        """
+        if self.__server is not None:
+            self.__server.close()
+        connections= list(self.__connections)
+        for task in connections:
+            task.cancel()
+        await asyncio.gather(*connections, return_exceptions=True)
+        if self.__server is not None:
+            await self.__server.wait_closed()
+        self.__executor.shutdown(wait=True)
+
+    async def __connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Internal method to answer the requests of one connection, until
+        the client closes it, asks to, or stays idle too long.
+        """
+        task= asyncio.current_task()
+        self.__connections.add(task)
+        try:
+            while True:
+                try:
+                    request= await asyncio.wait_for(self.__readRequest(reader), KEEP_ALIVE_TIMEOUT)
+                except _ServiceError as e:
+                    await self.__respond(writer, e.status, {'error': str(e), **e.fields}, False)
+                    break
+                if request is None:
+                    break
+                method, target, headers, body= request
+                keepAlive= self.__keepAlive(headers)
+                status, payload= await self.__dispatch(method, target, body)
+                await self.__respond(writer, status, payload, keepAlive)
+                if not keepAlive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.__connections.discard(task)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def __readRequest(self, reader: asyncio.StreamReader) -> tuple[str, str, dict[str, str], bytes] | None:
+        """
+        Internal method to read a request's line, headers and body.
+        Returns None if the connection was closed between requests.
+        """
+        try:
+            head= await reader.readuntil(b'\r\n\r\n')
+        except asyncio.IncompleteReadError as e:
+            if not e.partial.strip():
+                return None
+            raise
+        except asyncio.LimitOverrunError:
+            raise _ServiceError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Headers too large.")
+        lines= head.decode('latin-1').split('\r\n')
+        try:
+            method, target, version= lines[0].split(' ')
+        except ValueError:
+            raise _ServiceError(HTTPStatus.BAD_REQUEST, "Malformed request line.")
+        headers: dict[str, str]= {'version': version}
+        for line in lines[1:]:
+            if line:
+                name, _, value= line.partition(':')
+                headers[name.strip().lower()]= value.strip()
+        try:
+            length= int(headers.get('content-length', 0))
+        except ValueError:
+            raise _ServiceError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length.")
+        if length < 0:
+            raise _ServiceError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length.")
+        if length > MAX_BODY:
+            raise _ServiceError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large.")
+        body= await reader.readexactly(length) if length else b''
+        return method.upper(), target, headers, body
+
+    @staticmethod
+    def __keepAlive(headers: dict[str, str]) -> bool:
+        """
+        Internal method to check if the client keeps the connection open.
+        HTTP/1.1 does unless it asks not to, HTTP/1.0 only if it asks to.
+        """
+        connection= headers.get('connection', '').lower()
+        if headers['version'] == 'HTTP/1.0':
+            return connection == 'keep-alive'
+        return connection != 'close'
+
+    async def __dispatch(self, method: str, target: str, body: bytes) -> tuple[HTTPStatus, Any]:
+        """
+        Internal method to run the request's route on the thread pool.
+        """
+        url= urlsplit(target)
+        route= self.__routes.get((method, url.path))
+        if route is None:
+            if any(path == url.path for _, path in self.__routes):
+                return HTTPStatus.METHOD_NOT_ALLOWED, {'error': f"{method} not allowed on {url.path}."}
+            return HTTPStatus.NOT_FOUND, {'error': f"No route {url.path}."}
+        try:
+            if method == 'GET':
+                params= dict(parse_qsl(url.query))
+            else:
+                params= json.loads(body or b'{}')
+                if not isinstance(params, dict):
+                    raise _ServiceError(HTTPStatus.BAD_REQUEST, "The body must be a JSON object.")
+            loop= asyncio.get_running_loop()
+            return await loop.run_in_executor(self.__executor, route, params)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return HTTPStatus.BAD_REQUEST, {'error': "The body isn't valid JSON."}
+        except _ServiceError as e:
+            return e.status, {'error': str(e), **e.fields}
+        except Exception as e:
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {'error': str(e)}
+
+    async def __respond(self, writer: asyncio.StreamWriter, status: HTTPStatus, payload: Any, keepAlive: bool):
+        """
+        Internal method to write a JSON response.
+        """
+        body= json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        head= (f'HTTP/1.1 {status.value} {status.phrase}\r\n'
+               f'Content-Type: application/json; charset=utf-8\r\n'
+               f'Content-Length: {len(body)}\r\n'
+               f"Connection: {'keep-alive' if keepAlive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    @staticmethod
+    def __field(params: dict, name: str) -> str:
+        """
+        Internal method to get a required field of the request.
+        """
+        value= params.get(name)
+        if value is None or value == '':
+            raise _ServiceError(HTTPStatus.BAD_REQUEST, f"Missing field '{name}'.")
+        return str(value)
+
+    @staticmethod
+    def __book(params: dict) -> Book:
+        """
+        Internal method to create the book the request names.
+        """
+        field= LibraryService.__field
+        try:
+            return BookFactory.create_book_from_input(field(params, 'title'), field(params, 'author'),
+                                                      field(params, 'genre'), field(params, 'year'),
+                                                      copies=params.get('copies', 1))
+        except ValueError as e:
+            raise _ServiceError(HTTPStatus.BAD_REQUEST, str(e))
+
+    def __view(self, params: dict) -> tuple[HTTPStatus, Any]:
+        category= params.get('category', 'all')
+        if category not in VIEW_CATEGORIES:
+            raise _ServiceError(HTTPStatus.BAD_REQUEST, f"Unknown category '{category}'.")
+        return HTTPStatus.OK, [bookToDict(book) for book in self.library.viewBooklist(category)]
+
+    def __search(self, params: dict) -> tuple[HTTPStatus, Any]:
+        searchby= params.get('by', 'Title').title()
+        if searchby not in SEARCH_FIELDS:
+            raise _ServiceError(HTTPStatus.BAD_REQUEST, f"Unknown search field '{searchby}'.")
+        try:
+            books= self.library.searchBooklist(self.__field(params, 'query'), searchby)
+        except ValueError:
+            books= []
+        return HTTPStatus.OK, [bookToDict(book) for book in books]
+
+    def __add(self, params: dict) -> tuple[HTTPStatus, Any]:
+        book= self.__book(params)
+        if book.copies < 1:
+            raise _ServiceError(HTTPStatus.BAD_REQUEST, "A book must have at least one copy.")
+        return HTTPStatus.CREATED, bookToDict(self.library.addBook(book))
+
+    def __remove(self, params: dict) -> tuple[HTTPStatus, Any]:
+        try:
+            self.library.removeBook(self.__book(params))
+        except ValueError as e:
+            raise _ServiceError(HTTPStatus.NOT_FOUND, str(e))
+        return HTTPStatus.OK, {'removed': True}
+
+    def __borrow(self, params: dict) -> tuple[HTTPStatus, Any]:
+        loaner= self.__field(params, 'loaner')
+        try:
+            change= self.library.borrowBook(loaner, self.__book(params))
+        except _ServiceError:
+            raise
+        except Exception as e:
+            if str(e) == "waitlist":
+                return HTTPStatus.ACCEPTED, {'waitlisted': True}
+            raise _ServiceError(HTTPStatus.CONFLICT, str(e))
+        return HTTPStatus.OK, bookToDict(change.book)
+
+    def __return(self, params: dict) -> tuple[HTTPStatus, Any]:
+        loaner= self.__field(params, 'loaner')
+        try:
+            change= self.library.returnBook(loaner, self.__book(params))
+        except _ServiceError:
+            raise
+        except Exception as e:
+            if str(e) == "Book doesn't exist.":
+                raise _ServiceError(HTTPStatus.NOT_FOUND, str(e))
+            raise _ServiceError(HTTPStatus.CONFLICT, str(e))
+        return HTTPStatus.OK, bookToDict(change.book)
+
+    def __register(self, params: dict) -> tuple[HTTPStatus, Any]:
+        if not self.library.registerUser(self.__field(params, 'name'), self.__field(params, 'password')):
+            raise _ServiceError(HTTPStatus.CONFLICT, "Could not register the user.")
+        return HTTPStatus.CREATED, {'registered': True}
+
+    def __login(self, params: dict) -> tuple[HTTPStatus, Any]:
+        if not self.library.logInUser(self.__field(params, 'name'), self.__field(params, 'password')):
+            raise _ServiceError(HTTPStatus.UNAUTHORIZED, "Log in failed.")
+        return HTTPStatus.OK, {'loggedIn': True}
+
+def main():
+    parser= argparse.ArgumentParser(description="Serve the library over HTTP/JSON.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workers', type=int, default=None, help="threads running the library's calls")
+    args= parser.parse_args()
+    lib= library.Library()
+    service= LibraryService(lib, args.workers)
+    print(f"Serving the library on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(service.serveForever(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        lib.close()
+
+if __name__ == '__main__':
+    main()
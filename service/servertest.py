@@ -0,0 +1,117 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from database.library import Library
+from database.storage import CSVStorage
+from Users.hashing import PBKDF2Hasher
+from service.server import LibraryService
+
+class TestLibraryService(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        bookfile = os.path.join(self.dir.name, "books.csv")
+        with open(bookfile, "w") as f:
+            f.write("title,author,is_loaned,copies,genre,year\n")
+            f.write("Test Book,Test Author,No,1,Fiction,2023\n")
+        self.library = Library(CSVStorage(bookfile, os.path.join(self.dir.name, "users.csv")),
+                          hasher=PBKDF2Hasher(1000))
+        self.service = LibraryService(self.library)
+        server = await self.service.start(port=0)
+        self.port = server.sockets[0].getsockname()[1]
+        self.reader, self.writer = await asyncio.open_connection("127.0.0.1", self.port)
+
+    async def asyncTearDown(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+        await self.service.close()
+        self.library.close()
+        self.dir.cleanup()
+
+    async def request(self, method: str, target: str, body: dict = None) -> tuple[int, object]:
+        data = json.dumps(body).encode() if body is not None else b""
+        self.writer.write(f"{method} {target} HTTP/1.1\r\nHost: test\r\n"
+                          f"Content-Length: {len(data)}\r\n\r\n".encode() + data)
+        await self.writer.drain()
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        lines = head.decode().split("\r\n")
+        headers = dict(line.lower().split(": ", 1) for line in lines[1:] if line)
+        payload = await self.reader.readexactly(int(headers["content-length"]))
+        return int(lines[0].split(" ")[1]), json.loads(payload)
+
+    async def test_borrow_and_return(self):
+        book = {"title": "Test Book", "author": "Test Author", "genre": "Fiction", "year": 2023}
+        status, payload = await self.request("POST", "/borrow", {"loaner": "user1", **book})
+        self.assertEqual(status, 200)
+        self.assertEqual(payload["loaned_copies"], 1)
+        status, payload = await self.request("POST", "/borrow", {"loaner": "user2", **book})
+        self.assertEqual((status, payload), (202, {"waitlisted": True}))
+        status, payload = await self.request("POST", "/return", {"loaner": "user1", **book})
+        self.assertEqual(status, 200)
+        self.assertEqual(payload["waiting"], 0)
+        status, payload = await self.request("POST", "/return", {"loaner": "user2", **book})
+        self.assertEqual(status, 200)
+        status, payload = await self.request("POST", "/return", {"loaner": "user2", **book})
+        self.assertEqual((status, payload), (409, {"error": "Book isn't loaned."}))
+        status, payload = await self.request("POST", "/return", {"loaner": "user2", **book, "title": "Missing"})
+        self.assertEqual((status, payload), (404, {"error": "Book doesn't exist."}))
+
+    async def test_add_search_and_view(self):
+        status, _ = await self.request("POST", "/books", {"title": "New Book", "author": "Other Author",
+                                                          "genre": "sci-fi", "year": 1999, "copies": 2})
+        self.assertEqual(status, 201)
+        status, payload = await self.request("GET", "/search?by=author&query=Other%20Author")
+        self.assertEqual([book["title"] for book in payload], ["New Book"])
+        status, payload = await self.request("GET", "/books?category=available")
+        self.assertEqual(len(payload), 2)
+        status, payload = await self.request("GET", "/search?by=Title&query=Missing")
+        self.assertEqual((status, payload), (200, []))
+
+    async def test_add_existing_copies(self):
+        book = {"title": "Test Book", "author": "Test Author", "genre": "Fiction", "year": 2023}
+        status, payload = await self.request("POST", "/books", {**book, "copies": 5})
+        self.assertEqual((status, payload["copies"]), (201, 6))
+
+    async def test_negative_content_length(self):
+        self.writer.write(b"POST /login HTTP/1.1\r\nContent-Length: -5\r\n\r\n")
+        await self.writer.drain()
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        self.assertTrue(head.startswith(b"HTTP/1.1 400"))
+
+    async def test_invalid_body(self):
+        for data in (b"{", b'{"name": "\x80"}'):
+            self.writer.write(b"POST /login HTTP/1.1\r\nContent-Length: %d\r\n\r\n%s" % (len(data), data))
+            await self.writer.drain()
+            head = await self.reader.readuntil(b"\r\n\r\n")
+            self.assertTrue(head.startswith(b"HTTP/1.1 400"))
+            length = int(head.lower().split(b"content-length: ")[1].split(b"\r\n")[0])
+            await self.reader.readexactly(length)
+
+    async def test_close_open_connections(self):
+        status, _ = await self.request("GET", "/books")
+        self.assertEqual(status, 200)
+        await asyncio.wait_for(self.service.close(), 5)
+        self.assertEqual(await asyncio.wait_for(self.reader.read(), 5), b"")
+
+    async def test_register_and_login(self):
+        status, _ = await self.request("POST", "/register", {"name": "user1", "password": "secret"})
+        self.assertEqual(status, 201)
+        status, _ = await self.request("POST", "/login", {"name": "user1", "password": "wrong"})
+        self.assertEqual(status, 401)
+        status, payload = await self.request("POST", "/login", {"name": "user1", "password": "secret"})
+        self.assertEqual((status, payload), (200, {"loggedIn": True}))
+
+    async def test_errors(self):
+        status, _ = await self.request("POST", "/borrow", {"title": "Test Book"})
+        self.assertEqual(status, 400)
+        status, _ = await self.request("GET", "/borrow")
+        self.assertEqual(status, 405)
+        status, _ = await self.request("GET", "/missing")
+        self.assertEqual(status, 404)
+        status, _ = await self.request("POST", "/books/remove", {"title": "Missing", "author": "Nobody",
+                                                                 "genre": "Fiction", "year": 2000})
+        self.assertEqual(status, 404)
+
+if __name__ == '__main__':
+    unittest.main()